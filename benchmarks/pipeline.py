@@ -0,0 +1,380 @@
+"""Benchmark the parse and ASE to DLite pipeline on synthetic structures.
+
+Each case is a synthetic extended XYZ file with `NATOMS` atoms in each of
+`NFRAMES` frames, given as `NATOMSxNFRAMES`. The file is written to a temporary
+directory, so no network access is needed. For every case the stages of the
+pipeline are timed separately:
+
+- `download`: the file download strategy placing the content in the data cache.
+- `parse`: `AtomisticStructureParseStrategy` parsing the cached content. All
+  frames of a trajectory are stored, a single frame is stored as ase.Atoms.
+- `function`: `ASEDliteFunctionStrategy` converting the parsed structures to
+  DLite instances in a collection. The process-local atoms cache is cleared
+  first, so the structures are decoded from the data cache.
+
+Timings are the best of `--repeat` runs, after a warm-up run that loads the
+lazily imported dependencies. The `steps` of the parse and function stages are
+the records of the strategy instrumentation in the best run. The peak resident
+set size of each stage is measured in a separate run, with every stage in a
+fresh process, so that it includes the memory allocated by DLite and NumPy
+outside of the Python allocator. A process inherits the peak of the process it
+is forked from, so the processes are forked from a server started before the
+benchmark. `base_rss` is the peak after importing the pipeline, and `peak_rss`
+the peak after running the stage. The `resource` module used is only available
+on Unix.
+
+The default cases stop at 1e5 atoms and 1e4 frames. `--large` adds a case with
+1e7 atoms and one with 1e5 frames, which need several GiB of disk and memory.
+Results are written as JSON, and can be compared to the results of an earlier
+run with `--baseline`.
+
+Usage:
+
+```shell
+python benchmarks/pipeline.py --cases 10x1 1000000x1 100x10000 --output out.json
+```
+"""
+# pylint: disable=protected-access,import-outside-toplevel
+import argparse
+import importlib
+import json
+import multiprocessing
+import multiprocessing.forkserver
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+TOP_DIR = Path(__file__).resolve().parent.parent
+DATAMODEL = TOP_DIR / "tests" / "testfiles" / "Molecule.json"
+DEFAULT_CASES = ["10x1", "1000x1", "100000x1", "10x1000", "100x10000"]
+LARGE_CASES = ["10000000x1", "10x100000"]
+STAGES = ("download", "parse", "function")
+PIPELINE_MODULES = (
+    "ase.io",
+    "dlite",
+    "oteapi_asmod.strategies.function",
+    "oteapi_asmod.strategies.parse",
+)
+"""Modules imported before the memory of a stage is measured."""
+
+_SPECIES = np.array(["H", "C", "N", "O", "Si", "Cu"])
+
+
+def parse_case(case: str) -> "tuple[int, int]":
+    """Return the number of atoms and frames of a case given as `NATOMSxNFRAMES`."""
+    natoms, _, nframes = case.partition("x")
+    return int(natoms), int(nframes or 1)
+
+
+def write_synthetic(
+    path: Path, natoms: int, nframes: int, seed: int = 0, box: float = 100.0
+) -> int:
+    """Write an extended XYZ file with random frames and return its size in bytes.
+
+    The atom lines are formatted by NumPy, so that files with millions of atoms
+    are written in seconds.
+    """
+    rng = np.random.default_rng(seed)
+    table = np.empty(
+        natoms, dtype=[("species", "U2"), ("x", "f8"), ("y", "f8"), ("z", "f8")]
+    )
+    table["species"] = rng.choice(_SPECIES, size=natoms)
+    comment = (
+        f'Lattice="{box} 0.0 0.0 0.0 {box} 0.0 0.0 0.0 {box}" '
+        'Properties=species:S:1:pos:R:3 pbc="T T T"'
+    )
+    with open(path, "w", encoding="utf8") as handle:
+        for _ in range(nframes):
+            positions = rng.uniform(0.0, box, size=(natoms, 3))
+            table["x"], table["y"], table["z"] = positions.T
+            handle.write(f"{natoms}\n{comment}\n")
+            np.savetxt(handle, table, fmt="%-2s %15.8f %15.8f %15.8f")
+    return path.stat().st_size
+
+
+@contextmanager
+def measure(record: dict):
+    """Record the wall time of the enclosed block."""
+    start = time.perf_counter()
+    yield
+    record["time"] = time.perf_counter() - start
+
+
+def max_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_stage(  # pylint: disable=too-many-arguments
+    stage: str,
+    path: Path,
+    nframes: int,
+    cache_dir: Path,
+    key: "str | None",
+    instrument: bool,
+) -> "tuple[str | None, dict]":
+    """Run `stage` of the pipeline once and time it.
+
+    Parameters:
+        stage: The stage, one of `STAGES`.
+        path: The synthetic file.
+        nframes: The number of frames in the file.
+        cache_dir: The data cache directory shared by the stages.
+        key: The data cache key returned by the previous stage.
+        instrument: Whether to record the strategy instrumentation.
+
+    Returns:
+        The data cache key for the next stage, and the record of the stage.
+
+    """
+    from dlite import Collection
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+    from oteapi.plugins import create_strategy
+
+    from oteapi_asmod.atomscache import ATOMS_CACHE
+    from oteapi_asmod.instrumentation import get_instrumentation
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    datacache_config = {"cacheDir": str(cache_dir)}
+    configuration = {
+        "memoize": False,
+        "instrument": instrument,
+        "datacache_config": datacache_config,
+    }
+    if nframes > 1:
+        configuration["index"] = ":"
+    resource_config = ResourceConfig(
+        downloadUrl=path.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration=configuration,
+    )
+    record: dict = {}
+
+    if stage == "download":
+        with measure(record):
+            key = create_strategy("download", resource_config).get()["key"]
+    elif stage == "parse":
+        parser = AtomisticStructureParseStrategy(resource_config)
+        instrumentation = get_instrumentation("parse", instrument)
+        with measure(record):
+            key = parser._parse_downloaded(key, instrumentation).cached_atoms_key
+        if instrument:
+            record["steps"] = instrumentation.report()
+    else:
+        collection = Collection()
+        session = dict(SessionUpdate(collection_id=collection.uuid))
+        function = ASEDliteFunctionStrategy(
+            ASEDliteFunctionConfig(
+                functionType="asedlite/atoms",
+                configuration={
+                    "label": "molecule",
+                    "datacacheKey": key,
+                    "datamodel": DATAMODEL,
+                    "datacache_config": datacache_config,
+                    "instrument": instrument,
+                },
+            )
+        )
+        ATOMS_CACHE.clear()
+        with measure(record):
+            output = function.get(session)
+        if instrument:
+            record["steps"] = output.stages
+
+    return key, record
+
+
+def run_pipeline(path: Path, nframes: int, cache_dir: Path) -> dict:
+    """Run the pipeline on the file at `path` once and time its stages."""
+    stages = {}
+    key = None
+    for stage in STAGES:
+        key, stages[stage] = run_stage(stage, path, nframes, cache_dir, key, True)
+    return stages
+
+
+def _stage_rss(
+    stage: str, path: Path, nframes: int, cache_dir: Path, key: "str | None"
+) -> "tuple[str | None, dict]":
+    """Run `stage` in this fresh process and return its peak memory."""
+    from oteapi.plugins.factories import load_strategies
+
+    load_strategies()
+    for module in PIPELINE_MODULES:
+        importlib.import_module(module)
+    base = max_rss()
+    key, _ = run_stage(stage, path, nframes, cache_dir, key, False)
+    return key, {"base_rss": base, "peak_rss": max_rss()}
+
+
+def measure_memory(path: Path, nframes: int, cache_dir: Path) -> dict:
+    """Measure the peak resident set size of each stage in a fresh process."""
+    stages = {}
+    key = None
+    context = multiprocessing.get_context("forkserver")
+    for stage in STAGES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            key, stages[stage] = executor.submit(
+                _stage_rss, stage, path, nframes, cache_dir, key
+            ).result()
+    return stages
+
+
+def run_case(case: str, workdir: Path, repeat: int, memory: bool) -> dict:
+    """Run the benchmark for `case` and return its results."""
+    natoms, nframes = parse_case(case)
+    path = workdir / f"synthetic-{natoms}x{nframes}.xyz"
+    start = time.perf_counter()
+    size = write_synthetic(path, natoms, nframes)
+    result = {
+        "case": case,
+        "natoms": natoms,
+        "nframes": nframes,
+        "bytes": size,
+        "generate_time": time.perf_counter() - start,
+        "stages": {stage: {} for stage in STAGES},
+    }
+
+    for run in range(repeat):
+        stages = run_pipeline(path, nframes, workdir / f"cache-{case}-{run}")
+        for stage, record in stages.items():
+            if record["time"] < result["stages"][stage].get("time", float("inf")):
+                result["stages"][stage].update(record)
+    if memory:
+        stages = measure_memory(path, nframes, workdir / f"cache-{case}-memory")
+        for stage, record in stages.items():
+            result["stages"][stage].update(record)
+
+    path.unlink()
+    return result
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Return a description of each stage that is slower than in `baseline`."""
+    previous = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        if result["case"] not in previous:
+            continue
+        for stage, record in result["stages"].items():
+            before = previous[result["case"]]["stages"].get(stage, {}).get("time")
+            if before and record["time"] > before * (1 + tolerance):
+                regressions.append(
+                    f"{result['case']} {stage}: {before:.3f} s -> "
+                    f"{record['time']:.3f} s"
+                )
+    return regressions
+
+
+def environment() -> dict:
+    """Return the versions and platform the benchmark was run with."""
+    import ase
+    import dlite
+    import oteapi
+
+    import oteapi_asmod
+
+    return {
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "versions": {
+            "oteapi-asmod": oteapi_asmod.__version__,
+            "oteapi-core": oteapi.__version__,
+            "ase": ase.__version__,
+            "dlite": dlite.__version__,
+            "numpy": np.__version__,
+        },
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        default=DEFAULT_CASES,
+        help="Cases given as NATOMSxNFRAMES.",
+    )
+    parser.add_argument(
+        "--large",
+        action="store_true",
+        help=f"Add the cases {' '.join(LARGE_CASES)}.",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Skip the peak memory run."
+    )
+    parser.add_argument("--output", type=Path, help="JSON file for the results.")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare to.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Relative slowdown of a stage reported as a regression.",
+    )
+    args = parser.parse_args()
+
+    # The peak memory of a process includes that of the process it is forked
+    # from, so fork the memory runs from a server started while this is small
+    if not args.no_memory:
+        multiprocessing.forkserver.ensure_running()
+    from oteapi.plugins.factories import load_strategies
+
+    load_strategies()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm up, so that the first case does not include import times
+        run_case("1x1", Path(workdir), 1, False)
+        for case in args.cases + (LARGE_CASES if args.large else []):
+            result = run_case(case, Path(workdir), args.repeat, not args.no_memory)
+            results.append(result)
+            print(
+                f"{case:>12}: "
+                + "  ".join(
+                    f"{stage} {record['time']:8.3f} s"
+                    + (
+                        f" {record['peak_rss'] / 2**20:8.1f} MiB"
+                        if "peak_rss" in record
+                        else ""
+                    )
+                    for stage, record in result["stages"].items()
+                )
+            )
+
+    if args.output:
+        args.output.write_text(
+            json.dumps({"environment": environment(), "results": results}, indent=2),
+            encoding="utf8",
+        )
+    if args.baseline:
+        regressions = compare(
+            results,
+            json.loads(args.baseline.read_text(encoding="utf8")),
+            args.tolerance,
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
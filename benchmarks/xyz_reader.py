@@ -0,0 +1,64 @@
+"""Benchmark the fast XYZ reader against `ase.io.read`.
+
+Usage:
+
+```shell
+python benchmarks/xyz_reader.py --natoms 2000000 --nframes 1
+```
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from ase import Atoms
+from ase.io import iread, write
+
+from oteapi_asmod.xyz import iread_xyz
+
+
+def synthetic_xyz(natoms: int, nframes: int, seed: int = 0) -> bytes:
+    """Return extended XYZ content with `nframes` random frames of `natoms` atoms."""
+    rng = np.random.default_rng(seed)
+    numbers = rng.choice([1, 6, 8, 14, 29], size=natoms)
+    stream = io.StringIO()
+    for step in range(nframes):
+        atoms = Atoms(
+            numbers,
+            positions=rng.uniform(0.0, 100.0, size=(natoms, 3)),
+            cell=[100.0, 100.0, 100.0],
+            pbc=True,
+        )
+        atoms.info["step"] = step
+        write(stream, atoms, format="extxyz")
+    return stream.getvalue().encode("utf-8")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--natoms", type=int, default=2_000_000)
+    parser.add_argument("--nframes", type=int, default=1)
+    args = parser.parse_args()
+
+    data = synthetic_xyz(args.natoms, args.nframes)
+    print(f"{args.nframes} frame(s) of {args.natoms} atoms, {len(data) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    expected = list(
+        iread(io.StringIO(data.decode("utf-8")), index=":", format="extxyz")
+    )
+    ase_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = list(iread_xyz(data, ":"))
+    fast_time = time.perf_counter() - start
+
+    assert parsed == expected, "The fast reader and ase disagree"
+    print(f"ase.io.read: {ase_time:8.2f} s")
+    print(f"fast reader: {fast_time:8.2f} s")
+    print(f"speedup:     {ase_time / fast_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Asynchronous execution of the strategies for asyncio service workers.
+
+The `aget()` methods of the strategies run the blocking download, disk and CPU
+work of `get()` in a bounded thread pool, so that the event loop keeps serving
+other requests. The number of calls running or waiting for a thread is limited
+per event loop, see [`configure()`][oteapi_asmod.aio.configure].
+
+A call is cancelled when its task is cancelled or its timeout expires. The
+awaiting task is released immediately. The work in the thread stops at the next
+point where the strategy calls
+[`check_cancelled()`][oteapi_asmod.aio.check_cancelled], e.g. between stages
+and frames, by raising [`OperationCancelled`][oteapi_asmod.aio.OperationCancelled].
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Optional, TypeVar
+
+    T = TypeVar("T")
+
+DEFAULT_MAX_PENDING = 64
+"""Default maximum number of calls running or waiting per event loop."""
+
+_CANCELLED: "contextvars.ContextVar[Optional[threading.Event]]" = (
+    contextvars.ContextVar("oteapi_asmod_cancelled", default=None)
+)
+_LIMITS = {"max_workers": None, "max_pending": DEFAULT_MAX_PENDING}
+_EXECUTOR: "Optional[ThreadPoolExecutor]" = None
+_SEMAPHORES: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+_LOCK = threading.Lock()
+
+
+class OperationCancelled(OteapiAsmodError):
+    """Raised in a worker thread when its call was cancelled or timed out."""
+
+
+def configure(
+    max_workers: "Optional[int]" = None, max_pending: int = DEFAULT_MAX_PENDING
+) -> None:
+    """Set the concurrency limits of the asynchronous calls.
+
+    Calls already running keep their thread. New calls use the new limits.
+
+    Parameters:
+        max_workers: Number of threads doing the work. Defaults to the default
+            of `concurrent.futures.ThreadPoolExecutor`.
+        max_pending: Maximum number of calls running or waiting for a thread in
+            each event loop. Further calls wait before they are queued.
+
+    """
+    global _EXECUTOR  # pylint: disable=global-statement
+
+    if max_pending < 1:
+        raise OteapiAsmodError("max_pending must be a positive integer")
+    with _LOCK:
+        _LIMITS.update(max_workers=max_workers, max_pending=max_pending)
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = None
+        _SEMAPHORES.clear()
+
+
+def check_cancelled() -> None:
+    """Raise `OperationCancelled` if the current asynchronous call is cancelled.
+
+    Does nothing when not called from the work of an asynchronous call.
+    """
+    event = _CANCELLED.get()
+    if event is not None and event.is_set():
+        raise OperationCancelled("The operation was cancelled")
+
+
+async def run_blocking(
+    func: "Callable[..., T]", *args: "Any", timeout: "Optional[float]" = None
+) -> "T":
+    """Run `func(*args)` in the bounded thread pool and await its result.
+
+    Parameters:
+        func: The blocking function.
+        *args: Positional arguments to `func`.
+        timeout: Optional number of seconds after which the call is cancelled
+            and `asyncio.TimeoutError` is raised.
+
+    Returns:
+        The return value of `func`.
+
+    """
+    loop = asyncio.get_running_loop()
+    event = threading.Event()
+    context = contextvars.copy_context()
+    context.run(_CANCELLED.set, event)
+    async with _semaphore(loop):
+        future = loop.run_in_executor(
+            _executor(), functools.partial(context.run, func, *args)
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BaseException:
+            event.set()
+            raise
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Return the thread pool, created on first use."""
+    global _EXECUTOR  # pylint: disable=global-statement
+
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                _LIMITS["max_workers"], thread_name_prefix="oteapi-asmod"
+            )
+        return _EXECUTOR
+
+
+def _semaphore(loop: "asyncio.AbstractEventLoop") -> "asyncio.Semaphore":
+    """Return the semaphore limiting the pending calls in `loop`."""
+    with _LOCK:
+        semaphore = _SEMAPHORES.get(loop)
+        if semaphore is None:
+            semaphore = _SEMAPHORES[loop] = asyncio.Semaphore(_LIMITS["max_pending"])
+        return semaphore
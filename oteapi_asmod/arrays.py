@@ -0,0 +1,149 @@
+"""Flat array files for memory-mapped access to cached atoms.
+
+The positions, atomic numbers and masses of an ase.Atoms object can be written
+as raw little-endian arrays to a directory in the data cache directory, named
+after the data cache key of the atoms. Consumers can then open them with
+`numpy.memmap` as read-only views, without deserializing the atoms.
+
+The array files are kept next to, not in, the diskcache database, and are only
+used while the data cache entry of the atoms exists. The directories of expired
+or evicted entries are removed when they are opened, and by `prune_arrays()`,
+which is called every time arrays are written.
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional
+
+    from ase import Atoms
+    from oteapi.datacache import DataCache
+
+ARRAY_DTYPES = {"positions": "<f8", "numbers": "<i8", "masses": "<f8"}
+"""The arrays written and their little-endian dtypes."""
+
+_META_FILE = "arrays.json"
+
+
+def arrays_dir(cache: "DataCache", key: str) -> Path:
+    """Return the directory holding the array files of the atoms with `key`."""
+    return _arrays_root(cache) / key
+
+
+def _arrays_root(cache: "DataCache") -> Path:
+    """Return the directory holding the array directories of all keys."""
+    return Path(cache.cache_dir) / "oteapi-asmod-arrays"
+
+
+def prune_arrays(cache: "DataCache") -> int:
+    """Remove the array directories of keys no longer in the data cache.
+
+    Parameters:
+        cache: The data cache.
+
+    Returns:
+        The number of directories removed.
+
+    """
+    root = _arrays_root(cache)
+    if not root.is_dir():
+        return 0
+    removed = 0
+    for directory in root.iterdir():
+        if directory.is_dir() and directory.name not in cache:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def write_arrays(cache: "DataCache", key: str, atoms: "Atoms") -> Path:
+    """Write positions, numbers and masses of `atoms` as flat array files.
+
+    Each file is written under a temporary name and then renamed, so that
+    files already memory-mapped by readers are never truncated or modified.
+    The meta file, which marks the arrays as complete, is written last, so
+    readers never see partially written arrays. The directories of keys no
+    longer in the data cache are pruned first.
+
+    Parameters:
+        cache: The data cache, in whose directory the files are written.
+        key: The data cache key of `atoms`.
+        atoms: The atoms.
+
+    Returns:
+        The directory with the array files.
+
+    """
+    prune_arrays(cache)
+    directory = arrays_dir(cache, key)
+    directory.mkdir(parents=True, exist_ok=True)
+    values = {
+        "positions": atoms.positions,
+        "numbers": atoms.numbers,
+        "masses": atoms.get_masses(),
+    }
+    for name, dtype in ARRAY_DTYPES.items():
+        _replace(
+            directory / name, np.ascontiguousarray(values[name], dtype=dtype).tobytes()
+        )
+    _replace(directory / _META_FILE, json.dumps({"natoms": len(atoms)}).encode("utf8"))
+    return directory
+
+
+def _replace(path: Path, data: bytes) -> None:
+    """Atomically replace the file `path` with one containing `data`."""
+    handle, partial = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}-", suffix=".partial"
+    )
+    try:
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(data)
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+
+
+def has_arrays(cache: "DataCache", key: str) -> bool:
+    """Return whether array files have been written for the atoms with `key`,
+    and the atoms are still in the data cache."""
+    return key in cache and (arrays_dir(cache, key) / _META_FILE).exists()
+
+
+def open_arrays(cache: "DataCache", key: str) -> "Optional[Dict[str, np.ndarray]]":
+    """Open the array files of the atoms with `key` as read-only memory maps.
+
+    Parameters:
+        cache: The data cache.
+        key: The data cache key of the atoms.
+
+    Returns:
+        A dictionary with the `positions`, `numbers` and `masses` arrays, or
+        `None` if no array files have been written for `key`, or `key` is no
+        longer in the data cache.
+
+    """
+    directory = arrays_dir(cache, key)
+    if key not in cache:
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+    if not has_arrays(cache, key):
+        return None
+    meta = json.loads((directory / _META_FILE).read_text(encoding="utf8"))
+    natoms = meta["natoms"]
+    shapes = {"positions": (natoms, 3), "numbers": (natoms,), "masses": (natoms,)}
+    if natoms == 0:
+        return {
+            name: np.empty(shapes[name], dtype=dtype)
+            for name, dtype in ARRAY_DTYPES.items()
+        }
+    return {
+        name: np.memmap(directory / name, dtype=dtype, mode="r", shape=shapes[name])
+        for name, dtype in ARRAY_DTYPES.items()
+    }
@@ -0,0 +1,133 @@
+"""Process-local cache of decoded ase.Atoms objects.
+
+Strategies running one after another in the same process, e.g. a parse
+followed by a function, often read the same data cache key. The decoded atoms
+are kept in a least-recently-used cache, bounded by the total number of atoms,
+so that later reads skip reading and decoding the data cache value.
+
+The atoms returned from the cache are shared between all readers and must not
+be modified. Copy them with `atoms.copy()` first.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple, Union
+
+    from ase import Atoms
+
+DEFAULT_MAX_ATOMS = 1_000_000
+"""Default maximum total number of atoms in the cache."""
+
+
+class AtomsCache:
+    """Least-recently-used cache of decoded atoms, bounded by their atom count.
+
+    Parameters:
+        max_atoms: Maximum total number of atoms of all entries. Values with
+            more atoms are not cached. Zero disables the cache.
+
+    """
+
+    def __init__(self, max_atoms: int = DEFAULT_MAX_ATOMS) -> None:
+        self.max_atoms = max_atoms
+        self.natoms = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, str, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(
+        self, key: str, serialization: "Optional[str]" = None
+    ) -> "Optional[Union[Atoms, List[Atoms]]]":
+        """Return the atoms stored under `key`, or `None` on a miss.
+
+        Parameters:
+            key: The data cache key.
+            serialization: The expected serialization. Atoms stored with
+                another serialization are not returned.
+
+        Returns:
+            An ase.Atoms object or a list of them, or `None`.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or serialization not in (None, entry[1]):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(
+        self, key: str, images: "Union[Atoms, List[Atoms]]", serialization: str
+    ) -> None:
+        """Store decoded atoms under `key`, replacing any previous entry.
+
+        Parameters:
+            key: The data cache key.
+            images: An ase.Atoms object or a list of them.
+            serialization: The serialization of the data cache value.
+
+        """
+        natoms = (
+            sum(len(atoms) for atoms in images)
+            if isinstance(images, list)
+            else len(images)
+        )
+        with self._lock:
+            self._remove(key)
+            if natoms > self.max_atoms:
+                return
+            self._entries[key] = (images, serialization, natoms)
+            self.natoms += natoms
+            self._shrink()
+
+    def invalidate(self, key: str) -> None:
+        """Remove the entry of `key`, if any."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.natoms = self.hits = self.misses = self.evictions = 0
+
+    def resize(self, max_atoms: int) -> None:
+        """Change the maximum total number of atoms, evicting entries as needed."""
+        with self._lock:
+            self.max_atoms = max_atoms
+            self._shrink()
+
+    def stats(self) -> "Dict[str, int]":
+        """Return the hit, miss and eviction counts and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "natoms": self.natoms,
+                "max_atoms": self.max_atoms,
+            }
+
+    def _remove(self, key: str) -> None:
+        """Remove the entry of `key`, if any. The lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.natoms -= entry[2]
+
+    def _shrink(self) -> None:
+        """Evict the least recently used entries until the bound holds."""
+        while self.natoms > self.max_atoms:
+            _, entry = self._entries.popitem(last=False)
+            self.natoms -= entry[2]
+            self.evictions += 1
+
+
+ATOMS_CACHE = AtomsCache()
+"""The cache shared by all strategies of this process."""
@@ -0,0 +1,93 @@
+"""Detection and streaming decompression of compressed downloads.
+
+The compression of downloaded content is hinted by the media type, e.g.
+`application/gzip` or a `+gzip` structured suffix, or by the suffix chain of
+the file name, e.g. `trajectory.xyz.gz`. As servers may decompress content
+transparently, a hint is only trusted if the content starts with the magic
+bytes of that compression. Content with magic bytes is recognized without
+hints.
+
+Compressed content is decompressed as a stream while it is read, so that the
+decompressed content is never held in memory or written to disk as a whole.
+"""
+import bz2
+import gzip
+import io
+import lzma
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Optional, Tuple
+
+COMPRESSIONS = ("gz", "bz2", "xz")
+"""The supported compressions, named by their file name suffix."""
+
+_MAGIC = {"gz": b"\x1f\x8b", "bz2": b"BZh", "xz": b"\xfd7zXZ\x00"}
+_MEDIA_TYPES = {
+    "application/gzip": "gz",
+    "application/x-gzip": "gz",
+    "application/x-bzip2": "bz2",
+    "application/x-xz": "xz",
+}
+_MEDIA_TYPE_SUFFIXES = {"+gzip": "gz", "+bzip2": "bz2", "+xz": "xz"}
+_OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+def split_name(name: str) -> "Tuple[str, Optional[str]]":
+    """Split a compression suffix from a file name.
+
+    Parameters:
+        name: The file name, e.g. `"trajectory.xyz.gz"`.
+
+    Returns:
+        The file name without the compression suffix, e.g. `"trajectory.xyz"`,
+        and the compression, e.g. `"gz"`, or `None`.
+
+    """
+    stem, _, suffix = name.rpartition(".")
+    if stem and suffix.lower() in COMPRESSIONS:
+        return stem, suffix.lower()
+    return name, None
+
+
+def detect_compression(
+    media_type: "Optional[str]", name: str, content: "Any"
+) -> "Optional[str]":
+    """Return the compression of downloaded content.
+
+    Parameters:
+        media_type: The media type of the resource.
+        name: The file name of the resource.
+        content: The downloaded content.
+
+    Returns:
+        The compression, one of [`COMPRESSIONS`][oteapi_asmod.compression.COMPRESSIONS],
+        or `None` if the content is not compressed.
+
+    """
+    if not isinstance(content, bytes):
+        return None
+    hint = split_name(name)[1]
+    if media_type:
+        media_type = media_type.split(";")[0].strip().lower()
+        hint = _MEDIA_TYPES.get(media_type, hint)
+        for suffix, compression in _MEDIA_TYPE_SUFFIXES.items():
+            if media_type.endswith(suffix):
+                hint = compression
+    if hint is not None and content.startswith(_MAGIC[hint]):
+        return hint
+    for compression, magic in _MAGIC.items():
+        if content.startswith(magic):
+            return compression
+    return None
+
+
+def open_decompressed(content: bytes, compression: str) -> "IO[bytes]":
+    """Return a binary file object decompressing `content` while it is read."""
+    return _OPENERS[compression](io.BytesIO(content), "rb")
+
+
+def decompressed_head(content: bytes, compression: str, size: int = 65536) -> bytes:
+    """Return the first `size` bytes of decompressed `content`."""
+    with open_decompressed(content, compression) as stream:
+        return stream.read(size)
@@ -0,0 +1,168 @@
+"""Batched writes of DLite collections to storage.
+
+All instances of a collection are written through one open DLite storage, so
+that file based drivers, like `json`, write the file once when the storage is
+closed instead of once per instance.
+
+The UUIDs of the written instances are kept in the data cache for each
+collection and storage location. An incremental flush only writes the instances
+added since the last flush, appending them to the storage.
+
+Flushes may run in the background in a single writer thread, which keeps the
+flushes of a process in order. Use
+[`wait_for_flushes()`][oteapi_asmod.flush.wait_for_flushes] to wait for them.
+"""
+# pylint: disable=import-outside-toplevel
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import TYPE_CHECKING
+
+from oteapi.datacache.datacache import gethash
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Any, Dict, List, Optional, Set, Tuple
+
+    from oteapi.datacache import DataCache
+
+LOGGER = logging.getLogger(__name__)
+
+_WRITER: "Optional[ThreadPoolExecutor]" = None
+_FUTURES: "List[Future]" = []
+_PENDING: "Dict[str, Set[str]]" = {}
+_LOCK = threading.Lock()
+
+
+def flush_state_key(collection_id: str, driver: str, location: str) -> str:
+    """Return the data cache key of the UUIDs flushed to a storage location."""
+    return "oteapi-asmod-flush-" + gethash(
+        {"collection": collection_id, "driver": driver, "location": location}
+    )
+
+
+def flush_collection(  # pylint: disable=too-many-arguments
+    cache: "DataCache",
+    coll: "Any",
+    driver: str,
+    location: str,
+    options: "Optional[str]" = None,
+    incremental: bool = False,
+    save_collection: bool = True,
+    background: bool = False,
+) -> "List[str]":
+    """Write the instances of `coll` to a DLite storage in one batch.
+
+    Parameters:
+        cache: The data cache keeping the flushed UUIDs.
+        coll: The DLite collection.
+        driver: Name of the DLite storage driver, e.g. `"json"`.
+        location: Location of the storage, e.g. a file path.
+        options: Options to the storage driver. Unless a `mode` is given, the
+            storage is overwritten (`mode=w`), or appended to (`mode=a`) by an
+            incremental flush following an earlier flush.
+        incremental: Whether to only write the instances not flushed to this
+            location before.
+        save_collection: Whether to also write the collection itself, with the
+            labels of its instances.
+        background: Whether to write in the background writer thread.
+
+    Returns:
+        The labels of the instances written, or queued to be written.
+
+    """
+    key = flush_state_key(coll.uuid, driver, location)
+    with _LOCK:
+        pending = _PENDING.setdefault(key, set())
+        flushed = set(cache.get(key)) if key in cache else set()
+        skip = flushed | pending if incremental else set()
+        instances = [
+            (label, inst)
+            for label, inst in ((label, coll.get(label)) for label in coll.get_labels())
+            if inst.uuid not in skip
+        ]
+        mode = "a" if incremental and (flushed or pending) else "w"
+        uuids = {inst.uuid for _, inst in instances}
+        pending |= uuids
+
+    if options is None:
+        options = f"mode={mode}"
+    elif "mode=" not in options:
+        options = f"{options};mode={mode}"
+    args = (cache, key, coll, instances, uuids, driver, location, options)
+    if background:
+        with _LOCK:
+            future = _writer().submit(_write, *args, save_collection)
+            _FUTURES.append(future)
+        future.add_done_callback(_log_failure)
+    else:
+        _write(*args, save_collection)
+    return [label for label, _ in instances]
+
+
+def wait_for_flushes(timeout: "Optional[float]" = None) -> None:
+    """Wait for the background flushes queued so far.
+
+    Parameters:
+        timeout: Optional maximum number of seconds to wait.
+
+    Raises:
+        The exception of the first failed flush, if any.
+
+    """
+    with _LOCK:
+        futures = list(_FUTURES)
+    done, _ = wait_futures(futures, timeout)
+    with _LOCK:
+        for future in done:
+            _FUTURES.remove(future)
+    for future in futures:
+        if future in done and future.exception() is not None:
+            raise future.exception()  # type: ignore[misc]
+
+
+def _write(  # pylint: disable=too-many-arguments
+    cache: "DataCache",
+    key: str,
+    coll: "Any",
+    instances: "List[Tuple[str, Any]]",
+    uuids: "Set[str]",
+    driver: str,
+    location: str,
+    options: str,
+    save_collection: bool,
+) -> None:
+    """Write `instances` through one storage and record their UUIDs."""
+    from dlite import Storage
+
+    try:
+        with Storage(driver, location, options) as storage:
+            for _, inst in instances:
+                inst.save(storage)
+            if save_collection:
+                coll.save(storage)
+        with _LOCK:
+            # An overwritten storage holds only the instances just written
+            flushed: "Set[str]" = set()
+            if "mode=w" not in options and key in cache:
+                flushed = set(cache.get(key))
+            cache.add(sorted(flushed | uuids), key=key)
+    finally:
+        with _LOCK:
+            _PENDING[key] -= uuids
+
+
+def _writer() -> ThreadPoolExecutor:
+    """Return the background writer thread, created on first use."""
+    global _WRITER  # pylint: disable=global-statement
+
+    if _WRITER is None:
+        _WRITER = ThreadPoolExecutor(1, thread_name_prefix="oteapi-asmod-flush")
+    return _WRITER
+
+
+def _log_failure(future: "Future") -> None:
+    """Log the exception of a failed background flush."""
+    if not future.cancelled() and future.exception() is not None:
+        LOGGER.error("Background flush failed: %s", future.exception())
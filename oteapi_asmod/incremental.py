@@ -0,0 +1,143 @@
+"""Incremental ingestion of growing XYZ trajectory files.
+
+The state of an ingested resource is kept in the data cache: the byte offset
+just after the last complete frame ingested, the number of frames and the key
+of the trajectory manifest. A later ingestion of the same resource reads
+only the content after the offset, and appends the new frames to the
+trajectory.
+
+The state is only resumed if the content still ends with the same bytes before
+the offset, so that a resource that was replaced or truncated is ingested from
+the start again.
+"""
+import hashlib
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from oteapi.datacache.datacache import gethash
+from oteapi.models import AttrDict
+from pydantic import Field
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict
+
+    from oteapi.datacache import DataCache
+
+CHECK_BYTES = 4096
+"""Number of bytes before the offset that must be unchanged to resume."""
+
+
+class IngestState(AttrDict):
+    """State of an incrementally ingested resource."""
+
+    offset: int = Field(
+        0, description="Byte offset just after the last ingested frame."
+    )
+    nframes: int = Field(0, description="Number of ingested frames.")
+    manifest_key: Optional[str] = Field(
+        None, description="Data cache key to the trajectory manifest."
+    )
+    checksum: Optional[str] = Field(
+        None,
+        description=(
+            "SHA-256 of the last `CHECK_BYTES` ingested bytes, used to detect "
+            "changed content."
+        ),
+    )
+
+
+class Tail(NamedTuple):
+    """Content to ingest.
+
+    Attributes:
+        data: The content, starting at byte offset `base` of the resource.
+        base: Byte offset of `data` in the resource.
+        start: Offset in `data` of the first frame to ingest.
+        resumed: Whether the ingestion continues from the previous state.
+
+    """
+
+    data: bytes
+    base: int
+    start: int
+    resumed: bool
+
+
+def state_key(url: str, options: "Dict[str, Any]") -> str:
+    """Return the data cache key of the ingestion state of a resource.
+
+    Parameters:
+        url: The URL of the resource.
+        options: The parse options that change the stored trajectory.
+
+    Returns:
+        The data cache key.
+
+    """
+    return "oteapi-asmod-incremental-" + gethash({"url": url, "options": options})
+
+
+def load_state(cache: "DataCache", key: str) -> IngestState:
+    """Return the ingestion state stored under `key`.
+
+    A new state is returned if there is none, or if the trajectory manifest or
+    any of its chunks is no longer in the cache.
+    """
+    if key not in cache:
+        return IngestState()
+    state = IngestState(**cache.get(key))
+    if state.manifest_key is None or state.manifest_key not in cache:
+        return IngestState()
+    if not all(chunk in cache for chunk in cache.get(state.manifest_key)["chunks"]):
+        return IngestState()
+    return state
+
+
+def checksum(data: bytes, end: int) -> str:
+    """Return the checksum of the `CHECK_BYTES` bytes before `end` in `data`."""
+    return hashlib.sha256(data[max(0, end - CHECK_BYTES) : end]).hexdigest()
+
+
+def tail_of_content(content: bytes, state: IngestState) -> Tail:
+    """Return the part of downloaded `content` that is not ingested yet.
+
+    Parameters:
+        content: The whole content of the resource.
+        state: The ingestion state of the resource.
+
+    Returns:
+        The content to ingest.
+
+    """
+    if (
+        state.offset
+        and len(content) >= state.offset
+        and checksum(content, state.offset) == state.checksum
+    ):
+        return Tail(content, 0, state.offset, True)
+    return Tail(content, 0, 0, False)
+
+
+def tail_of_file(path: "Path", state: IngestState) -> Tail:
+    """Read the part of a local file that is not ingested yet.
+
+    Only the bytes after the offset, and the bytes needed to verify the
+    checksum, are read from the file.
+
+    Parameters:
+        path: Path to the file.
+        state: The ingestion state of the file.
+
+    Returns:
+        The content to ingest.
+
+    """
+    with open(path, "rb") as handle:
+        base = max(0, state.offset - CHECK_BYTES)
+        if state.offset and path.stat().st_size >= state.offset:
+            handle.seek(base)
+            data = handle.read()
+            if checksum(data, state.offset - base) == state.checksum:
+                return Tail(data, base, state.offset - base, True)
+        handle.seek(0)
+        return Tail(handle.read(), 0, 0, False)
@@ -0,0 +1,302 @@
+"""Optional per-stage instrumentation of the strategies.
+
+A strategy opens a stage with `Instrumentation.stage()` around each step it
+wants to measure, and may set the number of bytes and atoms handled by the
+stage. Stages with the same name are accumulated, so that steps repeated for
+every structure are reported once. When the strategy is done, `report()`
+returns the records and passes each of them to the configured hooks.
+
+Hooks are given by name in the strategy configuration. The `"logging"` hook is
+always available. Other hooks are either registered with `register_hook()` or
+declared by an installed package as an entry point in the
+`oteapi_asmod.instrumentation_hooks` group. The configuration, which comes
+from the request, cannot name arbitrary import paths.
+
+If instrumentation is disabled, `get_instrumentation()` returns a shared no-op
+instance, whose stages do not read the clock or record anything.
+
+The strategy configurations derive from `InstrumentationConfig` and their
+session updates from `SessionUpdateInstrumented`, which hold the options and
+the reported stage records.
+"""
+import logging
+from importlib.metadata import entry_points
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from oteapi.models import AttrDict, SessionUpdate
+from pydantic import Field
+
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable
+
+    from ase import Atoms
+
+    Hook = Callable[[Dict[str, Any]], None]
+
+LOGGER = logging.getLogger(__name__)
+
+HOOKS_GROUP = "oteapi_asmod.instrumentation_hooks"
+"""Entry point group of the hooks declared by installed packages."""
+
+
+def _log_record(record: "Dict[str, Any]") -> None:
+    """Log a stage record."""
+    LOGGER.info(
+        "%s %s: %.6f s in %d call(s), %s bytes, %s atoms",
+        record["strategy"],
+        record["stage"],
+        record["seconds"],
+        record["calls"],
+        record["nbytes"],
+        record["natoms"],
+    )
+
+
+_HOOKS: "Dict[str, Hook]" = {"logging": _log_record}
+
+
+def register_hook(name: str, hook: "Hook") -> None:
+    """Register a hook under `name`, for use in the strategy configurations.
+
+    Parameters:
+        name: The name of the hook.
+        hook: A callable taking a stage record, i.e., a dictionary with the
+            `strategy`, `stage`, `seconds`, `calls`, `nbytes` and `natoms`.
+
+    """
+    _HOOKS[name] = hook
+
+
+def resolve_hook(name: str) -> "Hook":
+    """Return the hook registered or declared as an entry point under `name`.
+
+    Raises:
+        OteapiAsmodError: If no such hook exists.
+
+    """
+    if name in _HOOKS:
+        return _HOOKS[name]
+    declared = entry_points()
+    if hasattr(declared, "select"):
+        group = declared.select(group=HOOKS_GROUP)
+    else:  # Python 3.9
+        group = declared.get(HOOKS_GROUP, ())
+    for entry_point in group:
+        if entry_point.name == name:
+            hook = _HOOKS[name] = entry_point.load()
+            return hook
+    raise OteapiAsmodError(f"Unknown instrumentation hook: {name}")
+
+
+class Stage:
+    """A measured stage, used as a context manager.
+
+    Attributes:
+        nbytes: Number of bytes handled by the stage, if known.
+        natoms: Number of atoms handled by the stage, if known.
+
+    """
+
+    __slots__ = ("name", "nbytes", "natoms", "_instrumentation", "_start")
+
+    def __init__(
+        self,
+        instrumentation: "Instrumentation",
+        name: str,
+        nbytes: "Optional[int]" = None,
+        natoms: "Optional[int]" = None,
+    ) -> None:
+        self.name = name
+        self.nbytes = nbytes
+        self.natoms = natoms
+        self._instrumentation = instrumentation
+        self._start = 0.0
+
+    def __enter__(self) -> "Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: "Any") -> None:
+        self._instrumentation.add(
+            self.name, time.perf_counter() - self._start, self.nbytes, self.natoms
+        )
+
+    def count(self, images: "Iterable[Atoms]") -> "Iterable[Atoms]":
+        """Add the atoms of `images` to `natoms` as they are iterated over."""
+        for atoms in images:
+            self.natoms = (self.natoms or 0) + len(atoms)
+            yield atoms
+
+
+class _NullStage(Stage):
+    """A stage that is not measured."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "Stage":
+        return self
+
+    def __exit__(self, *exc_info: "Any") -> None:
+        pass
+
+    def count(self, images: "Iterable[Atoms]") -> "Iterable[Atoms]":
+        return images
+
+
+class Instrumentation:
+    """Records of the stages of a strategy.
+
+    Parameters:
+        strategy: Name of the instrumented strategy, included in the records.
+        hooks: Names of the hooks to report the records to.
+
+    """
+
+    enabled = True
+
+    def __init__(self, strategy: str, hooks: "Iterable[str]" = ()) -> None:
+        self.strategy = strategy
+        self.hooks = [resolve_hook(hook) for hook in hooks]
+        self._records: "Dict[str, Dict[str, Any]]" = {}
+
+    def stage(
+        self, name: str, nbytes: "Optional[int]" = None, natoms: "Optional[int]" = None
+    ) -> Stage:
+        """Return a context manager measuring the stage `name`."""
+        return Stage(self, name, nbytes, natoms)
+
+    def add(
+        self,
+        name: str,
+        seconds: float,
+        nbytes: "Optional[int]" = None,
+        natoms: "Optional[int]" = None,
+        calls: int = 1,
+    ) -> None:
+        """Add a measurement of the stage `name`, accumulating repeated stages."""
+        record = self._records.get(name)
+        if record is None:
+            self._records[name] = {
+                "strategy": self.strategy,
+                "stage": name,
+                "seconds": seconds,
+                "calls": calls,
+                "nbytes": nbytes,
+                "natoms": natoms,
+            }
+            return
+        record["seconds"] += seconds
+        record["calls"] += calls
+        for field, value in (("nbytes", nbytes), ("natoms", natoms)):
+            if value is not None:
+                record[field] = (record[field] or 0) + value
+
+    def extend(self, records: "Optional[Iterable[Dict[str, Any]]]") -> None:
+        """Accumulate records reported by another instrumentation."""
+        for record in records or ():
+            self.add(
+                record["stage"],
+                record["seconds"],
+                record["nbytes"],
+                record["natoms"],
+                record["calls"],
+            )
+
+    def report(self) -> "Optional[List[Dict[str, Any]]]":
+        """Pass the records to the hooks and return them."""
+        records = list(self._records.values())
+        for hook in self.hooks:
+            for record in records:
+                hook(record)
+        return records
+
+
+class _NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing."""
+
+    enabled = False
+
+    def __init__(self) -> None:  # pylint: disable=super-init-not-called
+        self.strategy = ""
+        self.hooks = []
+        self._stage = _NullStage(self, "")
+
+    def stage(
+        self, name: str, nbytes: "Optional[int]" = None, natoms: "Optional[int]" = None
+    ) -> Stage:
+        return self._stage
+
+    def add(
+        self,
+        name: str,
+        seconds: float,
+        nbytes: "Optional[int]" = None,
+        natoms: "Optional[int]" = None,
+        calls: int = 1,
+    ) -> None:
+        pass
+
+    def extend(self, records: "Optional[Iterable[Dict[str, Any]]]") -> None:
+        pass
+
+    def report(self) -> "Optional[List[Dict[str, Any]]]":
+        return None
+
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
+"""Shared instrumentation used when instrumentation is disabled."""
+
+
+def get_instrumentation(
+    strategy: str, enabled: bool, hooks: "Iterable[str]" = ()
+) -> Instrumentation:
+    """Return a new instrumentation of `strategy` if `enabled`, else a no-op one.
+
+    Parameters:
+        strategy: Name of the instrumented strategy.
+        enabled: Whether to record the stages.
+        hooks: Names of the hooks to report the records to.
+
+    Returns:
+        The instrumentation.
+
+    """
+    if not enabled:
+        return NULL_INSTRUMENTATION
+    return Instrumentation(strategy, hooks)
+
+
+class InstrumentationConfig(AttrDict):
+    """Instrumentation options of a strategy configuration."""
+
+    instrument: bool = Field(
+        False,
+        description=(
+            "Whether to record wall time, byte and atom counts of each stage in "
+            "`stages` of the session update."
+        ),
+    )
+    instrumentation_hooks: List[str] = Field(
+        [],
+        description=(
+            "Names of the hooks the stage records are passed to if `instrument` "
+            "is enabled. Either `'logging'`, a hook registered with "
+            "`oteapi_asmod.instrumentation.register_hook()` or a hook declared "
+            "as an entry point in the `oteapi_asmod.instrumentation_hooks` group."
+        ),
+    )
+
+
+class SessionUpdateInstrumented(SessionUpdate):
+    """Session update of a strategy with instrumentation options."""
+
+    stages: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description=(
+            "Wall time, byte and atom counts of each stage, if `instrument` is "
+            "enabled."
+        ),
+    )
@@ -0,0 +1,95 @@
+"""In-process registry of DLite metadata loaded by the function strategies.
+
+Loading a datamodel with `Instance.create_from_url()` reads and parses the
+entity before DLite looks the metadata up by its URI. The registry keeps the
+loaded metadata in a bounded least-recently-used cache keyed by the datamodel
+URL or path.
+
+DLite keeps loaded metadata in its own store, keyed by the metadata URI, for
+the lifetime of the process. A datamodel file changed without changing its
+name, version or namespace therefore keeps resolving to the metadata loaded
+first, also after it is evicted from the registry. Give a changed datamodel a
+new version to load it.
+"""
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from dlite import Instance
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, Union
+
+    from pydantic import AnyUrl
+
+
+class MetadataRegistry:
+    """Bounded LRU registry of DLite metadata.
+
+    Parameters:
+        maxsize: Maximum number of metadata objects kept in the registry.
+
+    Attributes:
+        hits: Number of lookups served from the registry.
+        misses: Number of lookups that loaded the datamodel.
+        evictions: Number of entries evicted to respect `maxsize`.
+
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Instance]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, datamodel: "Union[AnyUrl, Path, str]") -> "Instance":
+        """Return the DLite metadata for `datamodel`, loading it if needed.
+
+        Parameters:
+            datamodel: URL or path to the datamodel.
+
+        Returns:
+            The DLite metadata.
+
+        """
+        key = str(datamodel)
+        with self._lock:
+            metadata = self._entries.get(key)
+            if metadata is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return metadata
+
+            self.misses += 1
+            metadata = Instance.create_from_url("json://" + key)
+            self._entries[key] = metadata
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return metadata
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> "Dict[str, Any]":
+        """Return the registry statistics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+metadata_registry = MetadataRegistry()
+"""The process-wide metadata registry used by the function strategies."""
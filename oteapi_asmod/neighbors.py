@@ -0,0 +1,151 @@
+"""Cutoff-based neighbor lists in compressed sparse row (CSR) form.
+
+Neighbors are found with the cell-list algorithm of
+`ase.neighborlist.primitive_neighbor_list()`, which bins the atoms into cells
+of the size of the cutoff and only compares atoms of adjacent cells. It scales
+linearly with the number of atoms, and handles periodic boundary conditions
+and non-periodic structures without a cell.
+
+The neighbors of atom `i` are `indices[indptr[i]:indptr[i + 1]]`, with the
+cell `shifts` of the neighbor images and the `distances`. The neighbor lists of
+all frames of a structure are stored as one `.npz` container in the data cache,
+under a key derived from the key of the atoms and the cutoff.
+"""
+# pylint: disable=import-outside-toplevel
+import io
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+from oteapi.datacache.datacache import gethash
+
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Iterable, List, Tuple
+
+    from ase import Atoms
+    from oteapi.datacache import DataCache
+
+
+class NeighborList(NamedTuple):
+    """Neighbors of all atoms of a structure, in CSR form.
+
+    Attributes:
+        indptr: Start of the neighbors of each atom in `indices`, and the total
+            number of neighbors, as int64.
+        indices: Indices of the neighbors, as int32.
+        shifts: Cell shift of each neighbor image, as int32 of shape `(n, 3)`.
+        distances: Distance to each neighbor.
+
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    shifts: np.ndarray
+    distances: np.ndarray
+
+    def bonds(self) -> "Tuple[np.ndarray, np.ndarray, np.ndarray]":
+        """Return each neighbor pair once.
+
+        Returns:
+            The first and second atom of each pair, with the first atom not
+            larger than the second, and their distances.
+
+        """
+        first = np.repeat(
+            np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr)
+        )
+        # A pair of an atom with its own image is kept for one shift direction
+        nonzero = self.shifts != 0
+        sign = np.sign(
+            self.shifts[np.arange(len(self.shifts)), np.argmax(nonzero, axis=1)]
+        )
+        keep = (first < self.indices) | ((first == self.indices) & (sign > 0))
+        return first[keep], self.indices[keep], self.distances[keep]
+
+
+def neighbor_list(atoms: "Atoms", cutoff: float) -> NeighborList:
+    """Return the neighbors of all atoms within `cutoff`.
+
+    Parameters:
+        atoms: The structure.
+        cutoff: The cutoff distance in Ångström.
+
+    Returns:
+        The neighbor list. Every pair is listed for both atoms.
+
+    """
+    from ase.neighborlist import primitive_neighbor_list
+
+    if cutoff <= 0:
+        raise OteapiAsmodError("The cutoff must be positive")
+    first, second, shifts, distances = primitive_neighbor_list(
+        "ijSd",
+        atoms.pbc,
+        atoms.cell.array,
+        atoms.positions,
+        cutoff,
+        self_interaction=False,
+        use_scaled_positions=False,
+    )
+    order = np.argsort(first, kind="stable")
+    indptr = np.zeros(len(atoms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(first, minlength=len(atoms)), out=indptr[1:])
+    return NeighborList(
+        indptr=indptr,
+        indices=second[order].astype(np.int32),
+        shifts=shifts[order].astype(np.int32),
+        distances=distances[order],
+    )
+
+
+def neighbors_key(atoms_key: str, cutoff: float) -> str:
+    """Return the data cache key of the neighbor lists of `atoms_key`."""
+    return "oteapi-asmod-neighbors-" + gethash(
+        {"atoms": atoms_key, "cutoff": float(cutoff)}
+    )
+
+
+def store_neighbors(
+    cache: "DataCache", key: str, lists: "Iterable[NeighborList]", batch: bool = True
+) -> str:
+    """Store the neighbor lists of all frames of a structure under `key`.
+
+    Parameters:
+        cache: The data cache.
+        key: The data cache key, see
+            [`neighbors_key()`][oteapi_asmod.neighbors.neighbors_key].
+        lists: The neighbor list of each frame.
+        batch: Whether the atoms are a list or trajectory of frames, rather
+            than a single ase.Atoms object.
+
+    Returns:
+        The data cache key.
+
+    """
+    buffers = {"batch": np.array(batch)}
+    for frame, neighbors in enumerate(lists):
+        for field, array in neighbors._asdict().items():
+            buffers[f"{frame}/{field}"] = array
+    stream = io.BytesIO()
+    np.savez(stream, **buffers)
+    return cache.add(stream.getvalue(), key=key)
+
+
+def load_neighbors(cache: "DataCache", key: str) -> "Tuple[List[NeighborList], bool]":
+    """Return the neighbor lists stored under `key`.
+
+    Returns:
+        The neighbor list of each frame, and whether the atoms are a list or
+        trajectory of frames.
+
+    """
+    with np.load(io.BytesIO(cache.get(key)), allow_pickle=False) as npz:
+        nframes = (len(npz.files) - 1) // len(NeighborList._fields)
+        lists = [
+            NeighborList(
+                **{field: npz[f"{frame}/{field}"] for field in NeighborList._fields}
+            )
+            for frame in range(nframes)
+        ]
+        return lists, bool(npz["batch"])
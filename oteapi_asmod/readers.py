@@ -0,0 +1,80 @@
+"""Helpers for reading downloaded content with the ase readers."""
+import io
+from typing import TYPE_CHECKING
+
+from ase.io.formats import UnknownFileTypeError, filetype, ioformats
+
+from oteapi_asmod.compression import decompressed_head, open_decompressed
+
+if TYPE_CHECKING:
+    from typing import IO, Optional, Union
+
+
+def guess_format(
+    name: str, content: "Union[bytes, str]", compression: "Optional[str]" = None
+) -> "Optional[str]":
+    """Guess the ase format of downloaded content.
+
+    The format is guessed from the file name, and if that fails, from the
+    leading bytes of the content. A compression suffix of the name is ignored.
+
+    Parameters:
+        name: The file name of the downloaded resource.
+        content: The downloaded content.
+        compression: The compression of the content, see
+            [`detect_compression()`][oteapi_asmod.compression.detect_compression].
+
+    Returns:
+        The name of the ase format, or `None` if it could not be guessed.
+
+    """
+    if name:
+        try:
+            fileformat = filetype(name, read=False)
+        except UnknownFileTypeError:
+            pass
+        else:
+            if fileformat in ioformats:
+                return fileformat
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    if compression is not None:
+        data = decompressed_head(data, compression)
+    try:
+        return filetype(io.BytesIO(data), read=True)
+    except (UnknownFileTypeError, OSError, ValueError):
+        return None
+
+
+def open_stream(
+    content: "Union[bytes, str]",
+    fileformat: "Optional[str]",
+    compression: "Optional[str]" = None,
+) -> "Optional[IO]":
+    """Return an in-memory file object for reading `content` with ase.
+
+    Compressed content is decompressed while it is read.
+
+    Parameters:
+        content: The downloaded content.
+        fileformat: The ase format to read the content with.
+        compression: The compression of the content, see
+            [`detect_compression()`][oteapi_asmod.compression.detect_compression].
+
+    Returns:
+        A binary or text file object, as expected by the ase reader, or `None`
+        if the reader needs a path to a real file.
+
+    """
+    ioformat = ioformats.get(fileformat) if fileformat else None
+    if ioformat is None or not ioformat.can_read or not ioformat.acceptsfd:
+        return None
+    if compression is not None:
+        stream = open_decompressed(content, compression)
+        if ioformat.isbinary:
+            return stream
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    if ioformat.isbinary:
+        return io.BytesIO(content) if isinstance(content, bytes) else None
+    if isinstance(content, str):
+        return io.StringIO(content)
+    return io.TextIOWrapper(io.BytesIO(content), encoding="utf-8")
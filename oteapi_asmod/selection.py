@@ -0,0 +1,103 @@
+"""Selection of atoms while frames are read.
+
+A selection keeps the atoms of each frame that are within an index range, of
+given elements and inside a bounding box. It is applied to each frame as soon
+as it is read, so that only the selected atoms are held in memory and stored.
+"""
+# pylint: disable=import-outside-toplevel
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from oteapi.models import AttrDict
+from pydantic import Field, validator
+
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator
+
+    import numpy as np
+    from ase import Atoms
+
+
+class AtomSelection(AttrDict):
+    """Selection of the atoms of each frame. All given criteria must hold."""
+
+    indices: Optional[Union[int, str]] = Field(
+        None,
+        description=(
+            "Atom index or slice in ASE syntax, e.g. `'0:1000'` or `'::2'`, "
+            "applied to the atoms of each frame."
+        ),
+    )
+    elements: Optional[List[str]] = Field(
+        None, description="Chemical symbols of the elements to keep, e.g. `['O']`."
+    )
+    box: Optional[List[List[float]]] = Field(
+        None,
+        description=(
+            "Lower and upper corners of a box in Cartesian coordinates, e.g. "
+            "`[[0, 0, 0], [10, 10, 10]]`. Atoms with positions inside the box, "
+            "as read and not wrapped into the cell, are kept."
+        ),
+    )
+
+    @validator("box")
+    def check_box(
+        cls, value: "Optional[List[List[float]]]"
+    ) -> "Optional[List[List[float]]]":
+        """Ensure the box is given by two corners."""
+        if value is not None and [len(corner) for corner in value] != [3, 3]:
+            raise ValueError("The box is given by two corners of 3 coordinates.")
+        return value
+
+
+def atom_mask(atoms: "Atoms", selection: AtomSelection) -> "np.ndarray":
+    """Return a boolean mask of the atoms of `atoms` in `selection`."""
+    import numpy as np
+    from ase.data import atomic_numbers
+    from ase.io.formats import string2index
+
+    mask = np.ones(len(atoms), dtype=bool)
+    if selection.indices is not None:
+        index = selection.indices
+        if isinstance(index, str):
+            index = string2index(index)
+        indexed = np.zeros(len(atoms), dtype=bool)
+        indexed[index] = True
+        mask &= indexed
+    if selection.elements is not None:
+        try:
+            numbers = [atomic_numbers[symbol] for symbol in selection.elements]
+        except KeyError as exc:
+            raise OteapiAsmodError(f"Unknown chemical symbol: {exc}") from exc
+        mask &= np.isin(atoms.numbers, numbers)
+    if selection.box is not None:
+        lower, upper = np.asarray(selection.box)
+        mask &= np.all((atoms.positions >= lower) & (atoms.positions <= upper), axis=1)
+    return mask
+
+
+def select_atoms(
+    images: "Iterable[Atoms]", selection: "Optional[AtomSelection]"
+) -> "Iterator[Atoms]":
+    """Apply `selection` to each frame of `images`.
+
+    Frames are consumed one at a time. A frame of which all atoms are selected
+    is yielded as is. Otherwise a new ase.Atoms object with the selected atoms
+    is yielded, which keeps the cell, `info` and per-atom `arrays`, but not the
+    calculator results of the whole frame.
+
+    Parameters:
+        images: The frames.
+        selection: The selection, or `None` to select all atoms.
+
+    Yields:
+        The selected atoms of each frame.
+
+    """
+    if selection is None:
+        yield from images
+        return
+    for atoms in images:
+        mask = atom_mask(atoms, selection)
+        yield atoms if mask.all() else atoms[mask]
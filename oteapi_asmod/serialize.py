@@ -0,0 +1,289 @@
+"""Serialization of ase.Atoms objects stored in the data cache.
+
+Two serializations are supported:
+
+- `atoms`: The ase.Atoms object (or list of objects) is added to the cache as
+  is. The cache key is a hash of the JSON representation of the atoms.
+- `npz`: The atoms are encoded into an uncompressed NumPy `.npz` container,
+  where numbers, positions, cell, pbc and all numerical `arrays`, `info` and
+  calculator results are kept as raw NumPy buffers. Numerical lists and tuples
+  in `info` are decoded as lists. Other values are JSON encoded like
+  `ase.io.jsonio` does, including nested NumPy arrays. The cache key is a hash
+  of the encoded bytes.
+
+Use [`load_atoms()`][oteapi_asmod.serialize.load_atoms] to read atoms back
+from the cache independent of how they were stored. Stored and loaded atoms are
+kept decoded in the process-local
+[`ATOMS_CACHE`][oteapi_asmod.atomscache.ATOMS_CACHE].
+"""
+import io
+import json
+from typing import TYPE_CHECKING
+
+import numpy as np
+from ase import Atoms
+from ase.calculators.singlepoint import SinglePointCalculator
+from ase.constraints import dict2constraint
+from ase.io.jsonio import MyEncoder, object_hook
+
+from oteapi_asmod.atomscache import ATOMS_CACHE
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Union
+
+    from oteapi.datacache import DataCache
+
+SERIALIZATIONS = ("atoms", "npz")
+"""Names of the supported serializations."""
+
+NPZ_MAGIC = b"PK\x03\x04"
+"""The leading bytes of an `.npz` container (a zip archive)."""
+
+_BASE_ARRAYS = ("numbers", "positions")
+
+
+def is_npz(value: "Any") -> bool:
+    """Return whether `value` is an `npz` encoded atoms container."""
+    return isinstance(value, bytes) and value[:4] == NPZ_MAGIC
+
+
+def encode_atoms(images: "Union[Atoms, List[Atoms]]") -> bytes:
+    """Encode an ase.Atoms object or a list of them into `npz` bytes.
+
+    Parameters:
+        images: The atoms to encode.
+
+    Returns:
+        The encoded atoms.
+
+    """
+    single = isinstance(images, Atoms)
+    frames = [images] if single else list(images)
+    buffers: "Dict[str, Any]" = {}
+    for i, atoms in enumerate(frames):
+        _encode_frame(buffers, f"{i}/", atoms)
+    buffers["meta"] = _json_buffer({"nframes": len(frames), "single": single})
+
+    stream = io.BytesIO()
+    np.savez(stream, **buffers)
+    return stream.getvalue()
+
+
+def _encode_frame(buffers: "Dict[str, Any]", prefix: str, atoms: "Atoms") -> None:
+    """Add the buffers of `atoms` to `buffers` with names starting with `prefix`."""
+    extra: "Dict[str, Any]" = {}
+
+    for name, value in atoms.arrays.items():
+        group = "" if name in _BASE_ARRAYS else "arrays/"
+        if value.dtype.hasobject:
+            extra.setdefault("arrays", {})[name] = value.tolist()
+        else:
+            buffers[f"{prefix}{group}{name}"] = value
+    buffers[f"{prefix}cell"] = atoms.cell.array
+    buffers[f"{prefix}pbc"] = atoms.pbc
+
+    for name, value in atoms.info.items():
+        array = _numeric_array(value)
+        if array is None:
+            extra.setdefault("info", {})[name] = value
+        else:
+            buffers[f"{prefix}info/{name}"] = array
+            if isinstance(value, (list, tuple)):
+                extra.setdefault("info_lists", []).append(name)
+
+    if isinstance(atoms.calc, SinglePointCalculator):
+        for name, value in atoms.calc.results.items():
+            buffers[f"{prefix}calc/{name}"] = np.asarray(value)
+
+    if atoms.constraints:
+        extra["constraints"] = [constraint.todict() for constraint in atoms.constraints]
+
+    if extra:
+        buffers[f"{prefix}extra"] = _json_buffer(extra)
+
+
+def _numeric_array(value: "Any") -> "Optional[np.ndarray]":
+    """Return `value` as a numerical array, or `None` if it is not numerical."""
+    if isinstance(value, (str, bytes, dict)) or value is None:
+        return None
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return None
+    return array if array.dtype.kind in "biufc" else None
+
+
+def _json_buffer(value: "Any") -> "np.ndarray":
+    """Return `value` JSON-encoded as a byte array."""
+    return np.frombuffer(
+        json.dumps(value, cls=MyEncoder).encode("utf-8"), dtype=np.uint8
+    )
+
+
+def decode_atoms(data: bytes) -> "Union[Atoms, List[Atoms]]":
+    """Decode `npz` bytes created with
+    [`encode_atoms()`][oteapi_asmod.serialize.encode_atoms].
+
+    Parameters:
+        data: The encoded atoms.
+
+    Returns:
+        An ase.Atoms object or a list of them, as they were encoded.
+
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        buffers = {name: npz[name] for name in npz.files}
+    meta = json.loads(buffers.pop("meta").tobytes())
+
+    grouped: "List[Dict[str, Any]]" = [{} for _ in range(meta["nframes"])]
+    for name, value in buffers.items():
+        frame, _, field = name.partition("/")
+        grouped[int(frame)][field] = value
+
+    frames = [_decode_frame(frame) for frame in grouped]
+    return frames[0] if meta["single"] else frames
+
+
+def _decode_frame(buffers: "Dict[str, Any]") -> "Atoms":
+    """Create ase.Atoms from the buffers of one frame."""
+    atoms = Atoms(
+        numbers=buffers.pop("numbers"),
+        positions=buffers.pop("positions"),
+        cell=buffers.pop("cell"),
+        pbc=buffers.pop("pbc"),
+    )
+    extra = (
+        json.loads(buffers.pop("extra").tobytes(), object_hook=object_hook)
+        if "extra" in buffers
+        else {}
+    )
+
+    results = {}
+    for field, value in buffers.items():
+        group, _, name = field.partition("/")
+        if group == "arrays":
+            atoms.arrays[name] = value
+        elif group == "info":
+            atoms.info[name] = value.item() if value.ndim == 0 else value
+        elif group == "calc":
+            results[name] = value.item() if value.ndim == 0 else value
+
+    for name, value in extra.get("arrays", {}).items():
+        atoms.arrays[name] = np.array(value, dtype=object)
+    for name in extra.get("info_lists", []):
+        atoms.info[name] = atoms.info[name].tolist()
+    atoms.info.update(extra.get("info", {}))
+    if extra.get("constraints"):
+        atoms.set_constraint(
+            [dict2constraint(constraint) for constraint in extra["constraints"]]
+        )
+    if results:
+        atoms.calc = SinglePointCalculator(atoms, **results)
+    return atoms
+
+
+def store_atoms(
+    cache: "DataCache",
+    images: "Union[Atoms, List[Atoms]]",
+    serialization: str = "atoms",
+    keep_decoded: bool = True,
+) -> str:
+    """Add atoms to the data cache with the given serialization.
+
+    Parameters:
+        cache: The data cache.
+        images: An ase.Atoms object or a list of them.
+        serialization: One of the supported
+            [`SERIALIZATIONS`][oteapi_asmod.serialize.SERIALIZATIONS].
+        keep_decoded: Whether to also keep `images` in the
+            [`ATOMS_CACHE`][oteapi_asmod.atomscache.ATOMS_CACHE]. They must
+            not be modified afterwards.
+
+    Returns:
+        The data cache key of the stored atoms.
+
+    """
+    if serialization == "atoms":
+        key = cache.add(images, json_encoder=MyEncoder)
+    elif serialization == "npz":
+        key = cache.add(encode_atoms(images))
+    else:
+        raise OteapiAsmodError(f"Unknown serialization: {serialization!r}")
+    if keep_decoded:
+        ATOMS_CACHE.put(key, images, serialization)
+    else:
+        ATOMS_CACHE.invalidate(key)
+    return key
+
+
+def load_atoms(
+    cache: "DataCache", key: str, serialization: "Optional[str]" = None
+) -> "Union[Atoms, List[Atoms]]":
+    """Return atoms stored in the data cache under `key`.
+
+    Parameters:
+        cache: The data cache.
+        key: The data cache key of the atoms.
+        serialization: The expected serialization. It is detected from the
+            cached value if not given.
+
+    Returns:
+        An ase.Atoms object or a list of them, as they were stored. They are
+        shared with other readers and must not be modified.
+
+    """
+    images = cached_atoms(cache, key, serialization)
+    if images is None:
+        images = decode_cached(cache.get(key), serialization, key=key)
+    return images
+
+
+def cached_atoms(
+    cache: "DataCache", key: str, serialization: "Optional[str]" = None
+) -> "Optional[Union[Atoms, List[Atoms]]]":
+    """Return atoms of `key` already decoded in this process, or `None`.
+
+    The decoded atoms are dropped if `key` is no longer in the data cache.
+
+    Parameters:
+        cache: The data cache.
+        key: The data cache key of the atoms.
+        serialization: The expected serialization.
+
+    Returns:
+        An ase.Atoms object or a list of them, or `None`.
+
+    """
+    images = ATOMS_CACHE.get(key, serialization)
+    if images is not None and key not in cache:
+        ATOMS_CACHE.invalidate(key)
+        return None
+    return images
+
+
+def decode_cached(
+    value: "Any", serialization: "Optional[str]" = None, key: "Optional[str]" = None
+) -> "Union[Atoms, List[Atoms]]":
+    """Return atoms from a value read from the data cache.
+
+    Parameters:
+        value: The cached value.
+        serialization: The expected serialization. It is detected from the
+            value if not given.
+        key: The data cache key of the value. If given, the decoded atoms are
+            kept in the [`ATOMS_CACHE`][oteapi_asmod.atomscache.ATOMS_CACHE].
+
+    Returns:
+        An ase.Atoms object or a list of them, as they were stored.
+
+    """
+    detected = "npz" if is_npz(value) else "atoms"
+    if serialization is not None and serialization != detected:
+        raise OteapiAsmodError(
+            f"Expected {serialization!r} serialization, found {detected!r}"
+        )
+    images = decode_atoms(value) if detected == "npz" else value
+    if key is not None:
+        ATOMS_CACHE.put(key, images, detected)
+    return images
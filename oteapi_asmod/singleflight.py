@@ -0,0 +1,96 @@
+"""Single-flight execution of identical requests across threads and processes.
+
+Identical requests running at the same time are serialized by a lock in the
+data cache, which lives in the cache directory and is shared by all processes
+using it. The first request does the work and records its result together with
+the time it finished. A request waiting for the lock reuses that result if it
+finished after the request arrived, and does the work itself otherwise.
+
+The lock is polled with a growing delay, checking in between whether the
+asynchronous call waiting for it is cancelled. It records a token of the request
+holding it, and is only released by that request, so that a request whose lock
+expired never releases the lock of the next one.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from oteapi_asmod.aio import check_cancelled
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterator, Tuple
+
+    from oteapi.datacache import DataCache
+
+RECORD_TTL = 60
+"""Number of seconds the result of a flight is kept for waiting requests."""
+
+POLL_INTERVAL = (0.001, 0.05)
+"""First and longest number of seconds between attempts to acquire the lock."""
+
+
+def single_flight(
+    cache: "DataCache", key: str, work: "Callable[[], Any]", timeout: float = 600
+) -> "Tuple[Any, bool]":
+    """Run `work` unless an identical request completes it meanwhile.
+
+    Parameters:
+        cache: The data cache holding the lock and the result record.
+        key: Identity of the request.
+        work: Function doing the work. Its result must be picklable.
+        timeout: Number of seconds after which the lock expires, in case the
+            process holding it died.
+
+    Returns:
+        The result of the work, and whether it was done by another request.
+
+    Raises:
+        OperationCancelled: If the asynchronous call is cancelled while waiting
+            for the lock.
+
+    """
+    arrival = time.time()
+    record_key = f"oteapi-asmod-flight-{key}"
+    with lock(cache, f"{record_key}-lock", expire=timeout):
+        record = cache.get(record_key) if record_key in cache else None
+        if record is not None and record["finished"] >= arrival:
+            return record["result"], True
+        result = work()
+        cache.add(
+            {"finished": time.time(), "result": result},
+            key=record_key,
+            expire=RECORD_TTL,
+        )
+    return result, False
+
+
+@contextmanager
+def lock(cache: "DataCache", key: str, expire: float) -> "Iterator[None]":
+    """Hold the lock `key` in the data cache.
+
+    Parameters:
+        cache: The data cache holding the lock.
+        key: Key of the lock.
+        expire: Number of seconds after which the lock expires, in case the
+            process holding it died.
+
+    Raises:
+        OperationCancelled: If the asynchronous call waiting for the lock is
+            cancelled.
+
+    """
+    token = uuid.uuid4().hex
+    delay = POLL_INTERVAL[0]
+    while True:
+        check_cancelled()
+        if cache.diskcache.add(key, token, expire=expire, retry=True):
+            break
+        time.sleep(delay)
+        delay = min(2 * delay, POLL_INTERVAL[1])
+    try:
+        yield
+    finally:
+        with cache.diskcache.transact(retry=True):
+            if cache.diskcache.get(key, retry=True) == token:
+                cache.diskcache.delete(key, retry=True)
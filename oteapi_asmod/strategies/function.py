@@ -1,21 +1,49 @@
 """Function strategy class for mapping ase.Atoms to dlite metadata."""
-# pylint: disable=no-self-use,unused-argument
+# pylint: disable=no-self-use,unused-argument,import-outside-toplevel
+import itertools
+import math
 import pathlib
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Union
 
-from dlite import Instance, get_collection
 from oteapi.datacache import DataCache
-from oteapi.models import AttrDict, DataCacheConfig, FunctionConfig, SessionUpdate
-from pydantic import Field, HttpUrl
+from oteapi.models import DataCacheConfig, FunctionConfig, SessionUpdate
+from pydantic import Field, HttpUrl, root_validator
 
+from oteapi_asmod.instrumentation import (
+    InstrumentationConfig,
+    SessionUpdateInstrumented,
+    get_instrumentation,
+)
 from oteapi_asmod.utils import OteapiAsmodError
 
 if TYPE_CHECKING:
-    from typing import Any, Dict
+    from typing import Iterable, Iterator, Tuple
 
+    import numpy as np
+    from ase import Atoms
 
-class ASEDliteConfig(AttrDict):
+    from oteapi_asmod.instrumentation import Instrumentation
+    from oteapi_asmod.neighbors import NeighborList
+
+    # Atomic numbers, custom masses and positions of a structure
+    Structure = Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]
+
+# numpy, ase, dlite and the modules using them are imported on first use in
+# the strategies, so that loading the plugin stays cheap
+
+# Properties filled by the ASE to DLite function
+_PROPERTIES = (
+    "symbols",
+    "masses",
+    "positions",
+    "groundstate_energy",
+    "cells",
+    "energies",
+)
+
+
+class ASEDliteConfig(InstrumentationConfig):
     """ASE to Dlite entity configuration"""
 
     # The datamodel should ideally be an HttpUrl
@@ -29,17 +57,97 @@ class ASEDliteConfig(AttrDict):
     )
     label: str = Field(
         ...,
-        description=("Label of the molecule in the dlite collection."),
+        description=(
+            "Label of the molecule in the dlite collection. When converting a "
+            "batch, this is a template formatted with the `index` of each "
+            "structure, e.g. `'molecule-{index}'`. If the template has no "
+            "`{index}` field, `'-{index}'` is appended."
+        ),
     )
-    datacacheKey: str = Field(
-        ...,
-        description=("Key to ase.Atoms obejct in datacache"),
+    datacacheKey: Optional[str] = Field(
+        None,
+        description=(
+            "Key to ase.Atoms obejct in datacache. A key to a trajectory "
+            "manifest or a list of ase.Atoms converts all frames as a batch."
+        ),
+    )
+    datacacheKeys: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Keys to ase.Atoms obejcts in datacache, converted as a batch. "
+            "Used instead of `datacacheKey`."
+        ),
+    )
+    serialization: Optional[Literal["atoms", "npz"]] = Field(
+        None,
+        description=(
+            "Serialization of the ase.Atoms object in the datacache, see "
+            "`AtomisticParseConfig`. Detected from the cached value if not given."
+        ),
+    )
+    trajectory: bool = Field(
+        False,
+        description=(
+            "Whether to convert all frames of `datacacheKey` to one instance with "
+            "an `nframes` dimension, such as `Trajectory.json` in the test files, "
+            "instead of one instance per frame. All frames must have the same "
+            "atoms. The instance is added with `label` as is."
+        ),
+    )
+    properties: Optional[
+        List[
+            Literal[
+                "symbols",
+                "masses",
+                "positions",
+                "groundstate_energy",
+                "cells",
+                "energies",
+            ]
+        ]
+    ] = Field(
+        None,
+        description=(
+            "Names of the properties to fill, e.g. `['positions']`. Other "
+            "properties are left unset and are not computed, so the datamodel "
+            "does not need to have them. All properties are filled if not given. "
+            "`cells` and `energies` are only filled for a `trajectory`, and "
+            "`groundstate_energy` only otherwise."
+        ),
+    )
+    positions_dtype: Literal["float64", "float32"] = Field(
+        "float64",
+        description=(
+            "Floating point type of the positions passed to dlite. DLite stores "
+            "them with the type of the `positions` property of the datamodel, so "
+            "`float32` only halves their memory with a `float32` datamodel, such "
+            "as `Positions.json` in the test files."
+        ),
+    )
+    use_arrays: bool = Field(
+        True,
+        description=(
+            "Whether to read positions, numbers and masses from memory-mapped "
+            "array files, if the parse strategy has written them "
+            "(`write_arrays`), instead of loading the ase.Atoms object."
+        ),
     )
     datacache_config: Optional[DataCacheConfig] = Field(
         None,
         description="Configuration options for the local data cache.",
     )
 
+    @root_validator(skip_on_failure=True)
+    def ensure_key(cls, values: "Dict[str, Any]") -> "Dict[str, Any]":
+        """Ensure exactly one of `datacacheKey` and `datacacheKeys` is given."""
+        if (values.get("datacacheKey") is None) == (
+            values.get("datacacheKeys") is None
+        ):
+            raise ValueError("Give exactly one of datacacheKey and datacacheKeys.")
+        if values.get("trajectory") and values.get("datacacheKey") is None:
+            raise ValueError("A trajectory is converted from datacacheKey.")
+        return values
+
 
 class ASEDliteFunctionConfig(FunctionConfig):
     """ASEDlite function specific configuration."""
@@ -49,10 +157,13 @@ class ASEDliteFunctionConfig(FunctionConfig):
     )
 
 
-class SessionUpdateASEDliteFunction(SessionUpdate):
+class SessionUpdateASEDliteFunction(SessionUpdateInstrumented):
     """Class for returning value from ASEDlite function."""
 
     collection_id: str = Field(..., description="Dlite collection id.")
+    labels: List[str] = Field(
+        [], description="Labels of the molecules added to the collection."
+    )
 
 
 @dataclass
@@ -91,33 +202,850 @@ class ASEDliteFunctionStrategy:
             Returns SessionUpdate()
 
         """
-        model = self.function_config
+        from dlite import get_collection
+
+        from oteapi_asmod.metadata import metadata_registry
+
+        model = ASEDliteConfig(**self.function_config.configuration)
+        instrumentation = get_instrumentation(
+            "function", model.instrument, model.instrumentation_hooks
+        )
+
+        # Get collection from session
+        if session is None:
+            raise OteapiAsmodError("Missing session")
+        with instrumentation.stage("get_collection"):
+            coll = get_collection(session["collection_id"])
 
         # There should be a local folder with entitites at least until onto-ns is up
         # dlite.storage_path.append(str(pathlib.Path(__file__).parent.resolve()))
 
-        # Create dlite instance of metadata
-        moleculemodel = Instance.create_from_url(
-            "json://" + str(model.datamodel),
-        )  # DLite Metadata
+        # Get dlite instance of metadata, loaded once per process
+        with instrumentation.stage("metadata"):
+            moleculemodel = metadata_registry.get(model.datamodel)  # DLite Metadata
 
-        # Get ase.Atoms obejct from cache
         cache = DataCache(model.datacache_config)
-        atoms = cache.get(model.datacacheKey)
+        if model.trajectory:
+            with instrumentation.stage("trajectory") as stage:
+                inst = self._trajectory_instance(model, cache, moleculemodel)
+                stage.natoms = math.prod(list(inst.dimensions.values())[:2])
+            with instrumentation.stage("collection_add"):
+                coll.add(label=model.label, inst=inst)
+            return SessionUpdateASEDliteFunction(
+                collection_id=session["collection_id"],
+                labels=[model.label],
+                stages=instrumentation.report(),
+            )
+
+        # Get the atom arrays of the structures from cache, one chunk at a time
+        with instrumentation.stage("load"):
+            chunks, batch = self._load_structures(model, cache)
+        labels: "List[str]" = []
+        while True:
+            with instrumentation.stage("load") as stage:
+                structures = next(chunks, None)
+                if structures is None:
+                    break
+                stage.natoms = sum(len(numbers) for numbers, _, _ in structures)
+
+            self._add_instances(
+                model, coll, moleculemodel, structures, batch, labels, instrumentation
+            )
+
+        return SessionUpdateASEDliteFunction(
+            collection_id=session["collection_id"],
+            labels=labels,
+            stages=instrumentation.report(),
+        )
+
+    async def aget(
+        self, session: "Dict" = None, timeout: "Optional[float]" = None
+    ) -> SessionUpdateASEDliteFunction:
+        """Execute the strategy asynchronously.
+
+        The conversion runs in the thread pool of `oteapi_asmod.aio`, with its
+        concurrency limits.
+
+        Parameters:
+            session: A session-specific dictionary context.
+            timeout: Optional number of seconds after which the call is cancelled
+                and `asyncio.TimeoutError` is raised.
+
+        Returns:
+            The same as `get()`.
+
+        """
+        from oteapi_asmod.aio import run_blocking
+
+        return await run_blocking(self.get, session, timeout=timeout)
+
+    def _add_instances(  # pylint: disable=too-many-arguments,too-many-locals
+        self,
+        model: ASEDliteConfig,
+        coll: "Any",
+        metadata: "Any",
+        structures: "List[Structure]",
+        batch: bool,
+        labels: "List[str]",
+        instrumentation: "Instrumentation",
+    ) -> None:
+        """Add an instance of `metadata` for each structure to `coll`.
+
+        The labels of the added instances are appended to `labels`.
+        """
+        import numpy as np
+        from ase.data import atomic_masses, chemical_symbols
+
+        from oteapi_asmod.aio import check_cancelled
+
+        fill = set(model.properties or _PROPERTIES)
+        # Look up symbols and default masses for the whole chunk at once
+        with instrumentation.stage("lookup") as stage:
+            natoms = np.array([len(numbers) for numbers, _, _ in structures])
+            offsets = np.concatenate(([0], np.cumsum(natoms)))
+            numbers = (
+                np.concatenate([numbers for numbers, _, _ in structures])
+                if fill & {"symbols", "masses"}
+                else np.empty(0, dtype=int)
+            )
+            if "symbols" in fill:
+                symbols = np.asarray(chemical_symbols)[numbers].tolist()
+            if "masses" in fill:
+                masses = atomic_masses[numbers]
+            stage.natoms = len(numbers)
+
+        # Creat dlite instances from metadata, populate and place them in collection
+        for start, stop, (_, custom_masses, positions) in zip(
+            offsets[:-1], offsets[1:], structures
+        ):
+            check_cancelled()
+            label = _label(model.label, len(labels), batch)
+            with instrumentation.stage("instance", natoms=int(stop - start)):
+                inst = metadata(dims=[stop - start, 3], id=label)
+                if "symbols" in fill:
+                    inst.symbols = symbols[start:stop]
+                if "masses" in fill:
+                    inst.masses = (
+                        masses[start:stop] if custom_masses is None else custom_masses
+                    )
+                if "positions" in fill:
+                    inst.positions = np.asarray(positions, dtype=model.positions_dtype)
+                if "groundstate_energy" in fill:
+                    inst.groundstate_energy = 0.0
+            with instrumentation.stage("collection_add"):
+                coll.add(label=label, inst=inst)
+            labels.append(label)
+
+    def _load_structures(
+        self, model: ASEDliteConfig, cache: DataCache
+    ) -> "Tuple[Iterator[List[Structure]], bool]":
+        """Return numbers, custom masses and positions of the structures to convert.
+
+        Memory-mapped array files are used where available. The frames of a
+        trajectory are loaded one chunk at a time, when iterated over. Custom
+        masses are `None` if the atomic masses of the elements are used.
+
+        Returns:
+            An iterator over chunks of structures, and whether the structures
+            are converted as a batch.
+
+        """
+        if model.datacacheKeys is None:
+            chunks, batch = self._structure_chunks(model, cache, model.datacacheKey)
+            return iter(chunks), batch
+        return (
+            itertools.chain.from_iterable(
+                self._structure_chunks(model, cache, key)[0]
+                for key in model.datacacheKeys
+            ),
+            True,
+        )
+
+    def _structure_chunks(
+        self, model: ASEDliteConfig, cache: DataCache, key: str
+    ) -> "Tuple[Iterable[List[Structure]], bool]":
+        """Return the structures stored under `key` in chunks, and whether
+        they are a batch."""
+        from oteapi_asmod.arrays import open_arrays
+
+        arrays = open_arrays(cache, key) if model.use_arrays else None
+        if arrays is not None:
+            return [[(arrays["numbers"], arrays["masses"], arrays["positions"])]], False
+        chunks, batch = _load_chunks(cache, key, model.serialization)
+        return (
+            [
+                (atoms.numbers, atoms.arrays.get("masses"), atoms.positions)
+                for atoms in chunk
+            ]
+            for chunk in chunks
+        ), batch
+
+    def _trajectory_instance(
+        self, model: ASEDliteConfig, cache: DataCache, metadata: "Any"
+    ) -> "Any":
+        """Return an instance of `metadata` with all frames of `datacacheKey`.
+
+        The frames are loaded one chunk at a time. The positions, cells and
+        energies of each chunk are copied as one block into the instance
+        arrays.
+        """
+        import numpy as np
+
+        chunks, nframes = self._trajectory_chunks(model, cache)
+        inst, arrays, numbers, start = None, {}, None, 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if inst is None:
+                inst, arrays = self._new_trajectory(model, metadata, nframes, chunk[0])
+                numbers = chunk[0].numbers
+            _copy_frames(arrays, start, chunk, numbers)
+            start += len(chunk)
+
+        if inst is None:
+            raise OteapiAsmodError("The trajectory has no frames")
+        for name, array in arrays.items():
+            if not np.shares_memory(array, getattr(inst, name)):
+                setattr(inst, name, array)
+        return inst
+
+    def _trajectory_chunks(
+        self, model: ASEDliteConfig, cache: DataCache
+    ) -> "Tuple[Iterable[List[Atoms]], int]":
+        """Return the frames of `datacacheKey` in chunks, and the number of frames."""
+        from oteapi_asmod.trajectory import load_manifest
+
+        chunks, _ = _load_chunks(cache, model.datacacheKey, model.serialization)
+        if isinstance(chunks, list):
+            return chunks, len(chunks[0])
+        return chunks, load_manifest(cache, model.datacacheKey).nframes
+
+    def _new_trajectory(
+        self, model: ASEDliteConfig, metadata: "Any", nframes: int, first: "Atoms"
+    ) -> "Tuple[Any, Dict[str, np.ndarray]]":
+        """Return a new trajectory instance with the atoms of frame `first`.
+
+        Returns:
+            The instance and the instance arrays the frames are copied into.
+
+        """
+        fill = set(model.properties or _PROPERTIES)
+        inst = metadata(dims=[nframes, len(first), 3], id=model.label)
+        if "symbols" in fill:
+            inst.symbols = first.get_chemical_symbols()
+        if "masses" in fill:
+            inst.masses = first.get_masses()
+        arrays = {
+            name: _instance_array(
+                inst,
+                name,
+                model.positions_dtype if name == "positions" else "float64",
+            )
+            for name in ("positions", "cells", "energies")
+            if name in fill
+        }
+        return inst, arrays
+
+
+class DliteASEConfig(InstrumentationConfig):
+    """Dlite entity to ASE configuration"""
+
+    label: Optional[str] = Field(
+        None,
+        description="Label of the molecule instance in the dlite collection.",
+    )
+    labels: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Labels of molecule instances in the dlite collection, each converted "
+            "to an ase.Atoms object. Used instead of `label`."
+        ),
+    )
+    serialization: Literal["atoms", "npz"] = Field(
+        "npz",
+        description=(
+            "Serialization of the ase.Atoms objects in the datacache, see "
+            "`AtomisticParseConfig`."
+        ),
+    )
+    datacache_config: Optional[DataCacheConfig] = Field(
+        None,
+        description="Configuration options for the local data cache.",
+    )
+
+    @root_validator(skip_on_failure=True)
+    def ensure_label(cls, values: "Dict[str, Any]") -> "Dict[str, Any]":
+        """Ensure exactly one of `label` and `labels` is given."""
+        if (values.get("label") is None) == (values.get("labels") is None):
+            raise ValueError("Give exactly one of label and labels.")
+        return values
+
+
+class DliteASEFunctionConfig(FunctionConfig):
+    """DliteASE function specific configuration."""
+
+    configuration: DliteASEConfig = Field(
+        ..., description="Dlite-ASE converter function specific configuration."
+    )
+
+
+class SessionUpdateDliteASEFunction(SessionUpdateInstrumented):
+    """Class for returning values from DliteASE function."""
+
+    cached_atoms_key: str = Field(
+        ...,
+        description=(
+            "The key to the ase.Atoms object in the data cache. The key of the "
+            "first object if `labels` was given."
+        ),
+    )
+    cached_atoms_keys: Optional[List[str]] = Field(
+        None,
+        description="The keys of the ase.Atoms objects, if `labels` was given.",
+    )
+
+
+@dataclass
+class DliteASEFunctionStrategy:
+    """Reverse mapping strategy, from dlite molecule instances to ase.Atoms."""
+
+    function_config: DliteASEFunctionConfig
+
+    def initialize(self, session: "Optional[Dict[str, Any]]" = None) -> SessionUpdate:
+        """Initialize strategy.
+
+        This method will be called through the `/initialize` endpoint of the OTE-API
+        Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            SessionUpdate()
+
+        """
+        return SessionUpdate()
+
+    def get(self, session: "Dict" = None) -> SessionUpdateDliteASEFunction:
+        """Execute the strategy.
 
-        # Creat dlite instance from metadata and populate
-        inst = moleculemodel(dims=[len(atoms), 3], id=model.label)  # DLite instance
-        inst.symbols = atoms.get_chemical_symbols()
-        inst.masses = atoms.get_masses()
-        inst.positions = atoms.positions
-        inst.groundstate_energy = 0.0
+        This method will be called through the strategy-specific endpoint of the
+        OTE-API Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            Keys to the ase.Atoms objects placed in the datacache.
+
+        """
+        from dlite import get_collection
 
-        # Get collection from session and place  molecule in it
-        if session is not None:
+        from oteapi_asmod.serialize import store_atoms
+
+        model = DliteASEConfig(**self.function_config.configuration)
+        instrumentation = get_instrumentation(
+            "function", model.instrument, model.instrumentation_hooks
+        )
+
+        if session is None:
+            raise OteapiAsmodError("Missing session")
+        with instrumentation.stage("get_collection"):
             coll = get_collection(session["collection_id"])
+
+        cache = DataCache(model.datacache_config)
+        keys = []
+        for label in model.labels or [model.label]:
+            with instrumentation.stage("build") as stage:
+                atoms = self._atoms_from_instance(coll.get(label))
+                stage.natoms = len(atoms)
+            with instrumentation.stage("store", natoms=len(atoms)):
+                # The atoms share memory with the instance
+                keys.append(
+                    store_atoms(cache, atoms, model.serialization, keep_decoded=False)
+                )
+
+        return SessionUpdateDliteASEFunction(
+            cached_atoms_key=keys[0],
+            cached_atoms_keys=keys if model.labels is not None else None,
+            stages=instrumentation.report(),
+        )
+
+    @staticmethod
+    def _atoms_from_instance(inst: "Any") -> "Atoms":
+        """Return an ase.Atoms object with the positions and masses of `inst`.
+
+        Positions and masses of dtype float64 are used as read-only views of the
+        instance arrays, without copying. Masses are only set if they differ
+        from the atomic masses of the elements.
+        """
+        import numpy as np
+        from ase import Atoms
+        from ase.data import atomic_masses, atomic_numbers
+
+        symbols, inverse = np.unique(
+            np.asarray(inst.symbols, dtype=str), return_inverse=True
+        )
+        try:
+            numbers = np.array([atomic_numbers[symbol] for symbol in symbols])
+        except KeyError as exc:
+            raise OteapiAsmodError(f"Unknown chemical symbol: {exc}") from exc
+        numbers = numbers[inverse.reshape(-1)] if len(symbols) else np.empty(0, int)
+
+        atoms = Atoms(numbers=numbers)
+        atoms.arrays["positions"] = _view(inst.positions, (len(atoms), 3))
+        masses = _view(inst.masses, (len(atoms),))
+        if not np.array_equal(masses, atomic_masses[numbers]):
+            atoms.arrays["masses"] = masses
+        return atoms
+
+
+class NeighborListConfig(InstrumentationConfig):
+    """Neighbor list configuration"""
+
+    datacacheKey: str = Field(
+        ...,
+        description=(
+            "Key to the ase.Atoms object in datacache. A key to a trajectory "
+            "manifest or a list of ase.Atoms gives a neighbor list per frame."
+        ),
+    )
+    cutoff: float = Field(
+        ..., description="Cutoff distance of neighbors in Ångström.", gt=0
+    )
+    serialization: Optional[Literal["atoms", "npz"]] = Field(
+        None,
+        description=(
+            "Serialization of the ase.Atoms object in the datacache, see "
+            "`AtomisticParseConfig`. Detected from the cached value if not given."
+        ),
+    )
+    datamodel: Optional[Union[HttpUrl, pathlib.Path]] = Field(
+        None,
+        description=(
+            "Optional dlite datamodel of a bond table with an `nbonds` dimension "
+            "and the properties `first`, `second` and `distances`, such as "
+            "`BondTable.json` in the test files. If given, a bond table listing "
+            "each neighbor pair once is added to the collection for each frame."
+        ),
+    )
+    label: Optional[str] = Field(
+        None,
+        description=(
+            "Label of the bond table in the dlite collection. Required with "
+            "`datamodel`. For more than one frame, this is a template formatted "
+            "with the `index` of each frame, see `ASEDliteConfig`."
+        ),
+    )
+    datacache_config: Optional[DataCacheConfig] = Field(
+        None,
+        description="Configuration options for the local data cache.",
+    )
+
+    @root_validator(skip_on_failure=True)
+    def ensure_label(cls, values: "Dict[str, Any]") -> "Dict[str, Any]":
+        """Ensure a bond table `datamodel` is given with a `label`."""
+        if values.get("datamodel") is not None and values.get("label") is None:
+            raise ValueError("A bond table datamodel requires a label.")
+        return values
+
+
+class NeighborListFunctionConfig(FunctionConfig):
+    """Neighbor list function specific configuration."""
+
+    configuration: NeighborListConfig = Field(
+        ..., description="Neighbor list function specific configuration."
+    )
+
+
+class SessionUpdateNeighborListFunction(SessionUpdateInstrumented):
+    """Class for returning values from the neighbor list function."""
+
+    neighbors_key: str = Field(
+        ...,
+        description=(
+            "The key to the neighbor lists in the data cache, see "
+            "`oteapi_asmod.neighbors.load_neighbors()`."
+        ),
+    )
+    nneighbors: List[int] = Field(
+        [],
+        description=(
+            "Number of neighbors, summed over all atoms, of each frame. Every "
+            "pair is counted for both atoms."
+        ),
+    )
+    cache_hit: bool = Field(
+        False,
+        description=(
+            "Whether the neighbor lists were computed earlier for the same atoms "
+            "and cutoff."
+        ),
+    )
+    labels: List[str] = Field(
+        [], description="Labels of the bond tables added to the collection."
+    )
+
+
+@dataclass
+class NeighborListFunctionStrategy:
+    """Strategy computing cutoff-based neighbor lists of ase.Atoms."""
+
+    function_config: NeighborListFunctionConfig
+
+    def initialize(self, session: "Optional[Dict[str, Any]]" = None) -> SessionUpdate:
+        """Initialize strategy.
+
+        This method will be called through the `/initialize` endpoint of the OTE-API
+        Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            SessionUpdate()
+
+        """
+        return SessionUpdate()
+
+    def get(
+        self, session: "Optional[Dict[str, Any]]" = None
+    ) -> SessionUpdateNeighborListFunction:
+        """Execute the strategy.
+
+        This method will be called through the strategy-specific endpoint of the
+        OTE-API Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            Key to the neighbor lists placed in the datacache.
+
+        """
+        from oteapi_asmod.neighbors import (
+            load_neighbors,
+            neighbor_list,
+            neighbors_key,
+            store_neighbors,
+        )
+
+        model = NeighborListConfig(**self.function_config.configuration)
+        instrumentation = get_instrumentation(
+            "function", model.instrument, model.instrumentation_hooks
+        )
+
+        cache = DataCache(model.datacache_config)
+        key = neighbors_key(model.datacacheKey, model.cutoff)
+        cache_hit = key in cache
+        if cache_hit:
+            with instrumentation.stage("load"):
+                lists, batch = load_neighbors(cache, key)
         else:
+            images, batch = _load_images(cache, model.datacacheKey, model.serialization)
+            lists = []
+            with instrumentation.stage("neighbors") as stage:
+                for atoms in stage.count(images):
+                    lists.append(neighbor_list(atoms, model.cutoff))
+            with instrumentation.stage("store"):
+                store_neighbors(cache, key, lists, batch)
+
+        labels = []
+        if model.datamodel is not None:
+            labels = _labels(model.label, len(lists), batch)
+            self._add_bond_tables(
+                session, model.datamodel, labels, lists, instrumentation
+            )
+
+        return SessionUpdateNeighborListFunction(
+            neighbors_key=key,
+            nneighbors=[len(neighbors.indices) for neighbors in lists],
+            cache_hit=cache_hit,
+            labels=labels,
+            stages=instrumentation.report(),
+        )
+
+    def _add_bond_tables(
+        self,
+        session: "Optional[Dict[str, Any]]",
+        datamodel: "Union[HttpUrl, pathlib.Path]",
+        labels: "List[str]",
+        lists: "List[NeighborList]",
+        instrumentation: "Instrumentation",
+    ) -> None:
+        """Add a bond table instance for each neighbor list to the collection."""
+        from dlite import get_collection
+
+        from oteapi_asmod.metadata import metadata_registry
+
+        if session is None:
             raise OteapiAsmodError("Missing session")
+        with instrumentation.stage("get_collection"):
+            coll = get_collection(session["collection_id"])
+        with instrumentation.stage("metadata"):
+            bondmodel = metadata_registry.get(datamodel)
+        for label, neighbors in zip(labels, lists):
+            with instrumentation.stage("bond_table"):
+                first, second, distances = neighbors.bonds()
+                inst = bondmodel(dims=[len(first)], id=label)
+                inst.first = first
+                inst.second = second
+                inst.distances = distances
+            with instrumentation.stage("collection_add"):
+                coll.add(label=label, inst=inst)
+
+
+class CollectionFlushConfig(InstrumentationConfig):
+    """Configuration of writing the session collection to DLite storage"""
+
+    driver: str = Field(
+        "json", description="Name of the DLite storage driver, e.g. `'json'`."
+    )
+    location: str = Field(..., description="Location of the storage, e.g. a file path.")
+    options: Optional[str] = Field(
+        None,
+        description=(
+            "Options to the storage driver, e.g. `'mode=w'`. By default the "
+            "storage is overwritten, or appended to by an `incremental` flush "
+            "following an earlier flush."
+        ),
+    )
+    incremental: bool = Field(
+        False,
+        description=(
+            "Whether to only write the instances added to the collection since "
+            "the last flush to the same location. The flushed instances are kept "
+            "in the data cache."
+        ),
+    )
+    save_collection: bool = Field(
+        True,
+        description=(
+            "Whether to also write the collection itself, with the labels of its "
+            "instances."
+        ),
+    )
+    background: bool = Field(
+        False,
+        description=(
+            "Whether to write in a background thread and return immediately. "
+            "Flushes run one at a time, in order. Use "
+            "`oteapi_asmod.flush.wait_for_flushes()` to wait for them."
+        ),
+    )
+    datacache_config: Optional[DataCacheConfig] = Field(
+        None,
+        description="Configuration options for the local data cache.",
+    )
+
+
+class CollectionFlushFunctionConfig(FunctionConfig):
+    """Collection flush function specific configuration."""
+
+    configuration: CollectionFlushConfig = Field(
+        ..., description="Collection flush function specific configuration."
+    )
+
+
+class SessionUpdateCollectionFlushFunction(SessionUpdateInstrumented):
+    """Class for returning values from the collection flush function."""
+
+    labels: List[str] = Field(
+        [],
+        description=(
+            "Labels of the instances written, or queued to be written if "
+            "`background` is enabled."
+        ),
+    )
+
+
+@dataclass
+class CollectionFlushFunctionStrategy:
+    """Strategy writing the session collection to DLite storage in one batch."""
+
+    function_config: CollectionFlushFunctionConfig
+
+    def initialize(self, session: "Optional[Dict[str, Any]]" = None) -> SessionUpdate:
+        """Initialize strategy.
+
+        This method will be called through the `/initialize` endpoint of the OTE-API
+        Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            SessionUpdate()
+
+        """
+        return SessionUpdate()
+
+    def get(
+        self, session: "Optional[Dict[str, Any]]" = None
+    ) -> SessionUpdateCollectionFlushFunction:
+        """Execute the strategy.
+
+        This method will be called through the strategy-specific endpoint of the
+        OTE-API Services.
+
+        Parameters:
+            session: A session-specific dictionary context.
+
+        Returns:
+            Labels of the instances written to storage.
+
+        """
+        from dlite import get_collection
+
+        from oteapi_asmod.flush import flush_collection
+
+        model = CollectionFlushConfig(**self.function_config.configuration)
+        instrumentation = get_instrumentation(
+            "function", model.instrument, model.instrumentation_hooks
+        )
+
+        if session is None:
+            raise OteapiAsmodError("Missing session")
+        with instrumentation.stage("get_collection"):
+            coll = get_collection(session["collection_id"])
+
+        with instrumentation.stage("flush"):
+            labels = flush_collection(
+                DataCache(model.datacache_config),
+                coll,
+                model.driver,
+                model.location,
+                options=model.options,
+                incremental=model.incremental,
+                save_collection=model.save_collection,
+                background=model.background,
+            )
+
+        return SessionUpdateCollectionFlushFunction(
+            labels=labels, stages=instrumentation.report()
+        )
+
+
+def _labels(label: str, count: int, batch: bool) -> "List[str]":
+    """Return the collection labels of `count` instances, see `_label()`."""
+    return [_label(label, index, batch) for index in range(count)]
+
+
+def _label(label: str, index: int, batch: bool) -> str:
+    """Return the collection label of instance number `index`.
+
+    For a batch, `{index}` in `label` is replaced by the index of the instance.
+    If `label` has no `{index}` field, `'-{index}'` is appended. Other braces
+    are kept as they are.
+    """
+    if not batch:
+        return label
+    template = label if "{index}" in label else label + "-{index}"
+    return template.replace("{index}", str(index))
+
+
+def _load_chunks(
+    cache: DataCache, key: str, serialization: "Optional[str]"
+) -> "Tuple[Iterable[List[Atoms]], bool]":
+    """Return the ase.Atoms stored under `key` in chunks.
+
+    The key may refer to a single ase.Atoms object, a list of them or a
+    trajectory manifest. The chunks of a trajectory are loaded from the cache
+    one at a time, when iterated over. Otherwise all atoms form one chunk.
+
+    Parameters:
+        cache: The data cache.
+        key: The data cache key.
+        serialization: The expected serialization, or `None` to detect it.
+
+    Returns:
+        The chunks of atoms and whether there may be more than one of them.
+
+    """
+    from ase import Atoms
+
+    from oteapi_asmod.serialize import cached_atoms, decode_cached
+    from oteapi_asmod.trajectory import is_manifest, iter_chunks
+
+    images = cached_atoms(cache, key, serialization)
+    if images is None:
+        value = cache.get(key)
+        if is_manifest(value):
+            return iter_chunks(cache, key), True
+        images = decode_cached(value, serialization, key=key)
+    if isinstance(images, Atoms):
+        return [[images]], False
+    return [list(images)], True
+
+
+def _load_images(
+    cache: DataCache, key: str, serialization: "Optional[str]"
+) -> "Tuple[Iterable[Atoms], bool]":
+    """Return the ase.Atoms stored under `key`, see `_load_chunks()`.
+
+    Returns:
+        The atoms and whether there may be more than one of them.
+
+    """
+    chunks, batch = _load_chunks(cache, key, serialization)
+    return itertools.chain.from_iterable(chunks), batch
+
+
+def _copy_frames(
+    arrays: "Dict[str, np.ndarray]",
+    start: int,
+    chunk: "List[Atoms]",
+    numbers: "np.ndarray",
+) -> None:
+    """Copy the positions, cells and energies of `chunk` into `arrays`, from
+    frame `start` on, converting to the dtype of the arrays.
+
+    Raises:
+        OteapiAsmodError: If the atomic numbers of a frame differ from `numbers`.
+
+    """
+    import numpy as np
+
+    for atoms in chunk:
+        if not np.array_equal(atoms.numbers, numbers):
+            raise OteapiAsmodError(
+                "All frames of a trajectory must have the same atoms"
+            )
+    stop = start + len(chunk)
+    if "positions" in arrays:
+        arrays["positions"][start:stop] = [atoms.positions for atoms in chunk]
+    if "cells" in arrays:
+        arrays["cells"][start:stop] = [atoms.cell.array for atoms in chunk]
+    if "energies" in arrays:
+        arrays["energies"][start:stop] = [_energy(atoms) for atoms in chunk]
+
+
+def _view(array: "Any", shape: "Tuple[int, ...]") -> "np.ndarray":
+    """Return a read-only float64 view of `array`, copying only if needed."""
+    import numpy as np
+
+    view = np.asarray(array, dtype=np.float64).reshape(shape).view()
+    view.flags.writeable = False
+    return view
+
+
+def _instance_array(inst: "Any", name: str, dtype: str = "float64") -> "np.ndarray":
+    """Return the array of property `name` of `inst` for writing.
+
+    DLite returns a view of the instance memory for numerical properties, which
+    is written to directly. Otherwise a new array of `dtype` is returned, which
+    must be assigned to the property when filled.
+    """
+    import numpy as np
+
+    array = getattr(inst, name)
+    if isinstance(array, np.ndarray) and array.flags.writeable:
+        return array
+    return np.array(array, dtype=dtype)
 
-        coll.add(label=model.label, inst=inst)
 
-        return SessionUpdateASEDliteFunction(collection_id=session["collection_id"])
+def _energy(atoms: "Atoms") -> float:
+    """Return the potential energy of `atoms`, or NaN if not known."""
+    if atoms.calc is not None and "energy" in atoms.calc.results:
+        return atoms.calc.results["energy"]
+    return atoms.info.get("energy", float("nan"))
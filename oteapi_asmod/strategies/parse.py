@@ -1,30 +1,138 @@
 """Demo strategy class for text/json."""
-# pylint: disable=no-self-use,unused-argument
+# pylint: disable=no-self-use,unused-argument,import-outside-toplevel
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Union
+from urllib.request import url2pathname
 
-from ase import Atoms
-from ase.io import read
-from ase.io.jsonio import MyEncoder
 from oteapi.datacache import DataCache
-from oteapi.models import AttrDict, DataCacheConfig, ResourceConfig, SessionUpdate
+from oteapi.datacache.datacache import gethash
+from oteapi.models import DataCacheConfig, ResourceConfig, SessionUpdate
+from oteapi.models.resourceconfig import HostlessAnyUrl
 from oteapi.plugins import create_strategy
-from pydantic import Field
+from pydantic import Field, root_validator
+
+from oteapi_asmod.incremental import (
+    IngestState,
+    Tail,
+    checksum,
+    load_state,
+    state_key,
+    tail_of_content,
+    tail_of_file,
+)
+from oteapi_asmod.instrumentation import (
+    InstrumentationConfig,
+    SessionUpdateInstrumented,
+    get_instrumentation,
+)
+from oteapi_asmod.selection import AtomSelection, select_atoms
+from oteapi_asmod.singleflight import single_flight
+from oteapi_asmod.summary import StructureSummary, summarize_images
+from oteapi_asmod.utils import OteapiAsmodError
 
 if TYPE_CHECKING:
-    from typing import Any, Dict
+    from typing import Callable, Iterator, Tuple
+
+    from ase import Atoms
+
+    from oteapi_asmod.instrumentation import Instrumentation
+    from oteapi_asmod.trajectory import TrajectoryManifest
+    from oteapi_asmod.xyz import XYZFrames
+
+# ase, numpy and the modules using them are imported on first use in the
+# strategies, so that loading the plugin stays cheap
+
+# Options that do not change the parsed result
+_MEMO_EXCLUDE = {
+    "memoize",
+    "fast_xyz",
+    "in_memory",
+    "datacache_config",
+    "downloadUrls",
+    "processes",
+    "download_workers",
+    "instrument",
+    "instrumentation_hooks",
+    "incremental",
+    "frame_index",
+    "single_flight",
+    "single_flight_timeout",
+}
+
+# Options that do not change the result of a request
+_FLIGHT_EXCLUDE = {
+    "instrument",
+    "instrumentation_hooks",
+    "single_flight",
+    "single_flight_timeout",
+}
 
 
-class SessionUpdateAtomisticParse(SessionUpdate):
+class SessionUpdateAtomisticParse(SessionUpdateInstrumented):
     """Class for returning values from oteapi-asmod Parse using ASE."""
 
-    cached_atoms_key: str = Field(
-        ...,
-        description="The key to the ase.Atoms object in the data cache.",
+    cached_atoms_key: Optional[str] = Field(
+        None,
+        description=(
+            "The key to the ase.Atoms object in the data cache. If a frame `index`"
+            " was given, this is the key to the trajectory manifest. Not set if "
+            "`inspect` is enabled."
+        ),
+    )
+    nframes: Optional[int] = Field(
+        None,
+        description=(
+            "Number of frames stored, if a frame `index` was given, or summarized, "
+            "if `inspect` is enabled."
+        ),
+    )
+    cached_atoms_keys: Optional[List[str]] = Field(
+        None,
+        description=(
+            "The keys of all parsed resources, in order, if `downloadUrls` was "
+            "given. The first key is the same as `cached_atoms_key`."
+        ),
+    )
+    parse_path: Optional[Literal["memory", "file"]] = Field(
+        None,
+        description=(
+            "Whether the content was parsed from `memory` or from a temporary "
+            "`file`. Not set if the content was not parsed."
+        ),
+    )
+    cache_hit: bool = Field(
+        False,
+        description=(
+            "Whether the result was reused from an earlier parse of identical "
+            "content with the same options, or from an identical request "
+            "running at the same time."
+        ),
+    )
+    appended_frames: Optional[int] = Field(
+        None,
+        description=(
+            "Number of frames appended to the trajectory, if `incremental` is "
+            "enabled."
+        ),
+    )
+    summary: Optional[StructureSummary] = Field(
+        None,
+        description="Summary of the frames, if `inspect` is enabled.",
+    )
+    summaries: Optional[List[StructureSummary]] = Field(
+        None,
+        description=(
+            "Summaries of all resources, in order, if `inspect` is enabled and "
+            "`downloadUrls` was given."
+        ),
     )
 
 
-class AtomisticParseConfig(AttrDict):
+class AtomisticParseConfig(InstrumentationConfig):
     """Pydantic model for the Atomistic parse strategy."""
 
     fileformat: Optional[str] = Field(
@@ -32,11 +140,167 @@ class AtomisticParseConfig(AttrDict):
         description=("Optional, to specify format as input to the ase reader."),
     )
 
+    index: Optional[Union[int, str]] = Field(
+        None,
+        description=(
+            "Optional frame index or slice in ASE syntax, e.g. `-1`, `'::10'` or "
+            "`'1000:2000'`. If given, the frames are streamed from the file and "
+            "stored as a chunked trajectory in the data cache."
+        ),
+    )
+
+    chunksize: int = Field(
+        1000,
+        description="Number of frames per data cache entry for trajectories.",
+        gt=0,
+    )
+
+    serialization: Literal["atoms", "npz"] = Field(
+        "atoms",
+        description=(
+            "How the parsed atoms are stored in the data cache. `atoms` stores the "
+            "ase.Atoms object as is, `npz` stores a compact binary container of "
+            "NumPy arrays, which is faster to store and load for large structures."
+        ),
+    )
+
+    select: Optional[AtomSelection] = Field(
+        None,
+        description=(
+            "Optional selection of the atoms of each frame, by index range, "
+            "element or bounding box. It is applied to each frame as it is read, "
+            "so that only the selected atoms are stored."
+        ),
+    )
+
+    write_arrays: bool = Field(
+        False,
+        description=(
+            "Whether to also write positions, numbers and masses as flat "
+            "little-endian array files in the data cache directory, for "
+            "memory-mapped access. Ignored if a frame `index` is given. The "
+            "files are not removed by expiry or eviction of the data cache."
+        ),
+    )
+
+    fast_xyz: bool = Field(
+        True,
+        description=(
+            "Whether to read XYZ and extended XYZ content with the fast, "
+            "vectorized XYZ reader. Frames it does not support are read by ase."
+        ),
+    )
+
+    frame_index: bool = Field(
+        True,
+        description=(
+            "Whether to store the byte offset and atom count of each frame of XYZ "
+            "content in the data cache, keyed by the content hash. Later parses of "
+            "the same content read the selected frames directly, without scanning "
+            "the content. Only used with `fast_xyz`."
+        ),
+    )
+
+    in_memory: bool = Field(
+        True,
+        description=(
+            "Whether to parse the downloaded content from memory for the formats "
+            "that the ase reader can read from a file object. Other formats are "
+            "always read from a temporary file."
+        ),
+    )
+
+    downloadUrls: Optional[List[HostlessAnyUrl]] = Field(
+        None,
+        description=(
+            "Optional additional resources to parse together with `downloadUrl`. "
+            "They are downloaded concurrently by a thread pool and parsed in "
+            "parallel by a process pool."
+        ),
+    )
+
+    download_workers: int = Field(
+        8,
+        description="Number of threads downloading resources given in `downloadUrls`.",
+        gt=0,
+    )
+
+    processes: Optional[int] = Field(
+        None,
+        description=(
+            "Number of processes parsing resources given in `downloadUrls`. "
+            "Defaults to the number of processors. The process pool is started "
+            "for each request, also for a single process."
+        ),
+        gt=0,
+    )
+
+    incremental: bool = Field(
+        False,
+        description=(
+            "Whether to ingest a growing XYZ trajectory incrementally. The byte "
+            "offset and frame count already ingested are kept in the data cache, "
+            "and later calls parse only the new frames and append them to the "
+            "trajectory. All frames are stored, so `index` must be `None` or "
+            "`':'`. Local files are read from the offset, other resources are "
+            "downloaded in full."
+        ),
+    )
+
+    inspect: bool = Field(
+        False,
+        description=(
+            "Whether to only summarize the frames selected by `index` (all frames "
+            "if not given) in `summary`, without storing them. XYZ content is "
+            "summarized from the frame headers and species without reading the "
+            "coordinates, unless atoms are selected with `select`."
+        ),
+    )
+
+    memoize: bool = Field(
+        True,
+        description=(
+            "Whether to reuse the result of an earlier parse of content with the "
+            "same hash and the same parse options."
+        ),
+    )
+
+    single_flight: bool = Field(
+        True,
+        description=(
+            "Whether identical requests, for the same resource with the same "
+            "options, running at the same time in any thread or process using "
+            "the same data cache are done only once. The other requests wait for "
+            "it and reuse its result."
+        ),
+    )
+
+    single_flight_timeout: float = Field(
+        600,
+        description=(
+            "Number of seconds after which a request waiting for an identical "
+            "request does the work itself, in case the process doing it died."
+        ),
+        gt=0,
+    )
+
     datacache_config: Optional[DataCacheConfig] = Field(
         None,
         description="Configuration options for the local data cache.",
     )
 
+    @root_validator(skip_on_failure=True)
+    def check_incremental(cls, values: "Dict[str, Any]") -> "Dict[str, Any]":
+        """Ensure incremental ingestion reads all frames of a single resource."""
+        if values.get("incremental"):
+            if values.get("index") not in (None, ":"):
+                raise ValueError("Incremental ingestion stores all frames.")
+            if values.get("downloadUrls"):
+                raise ValueError("Incremental ingestion of downloadUrls.")
+            if values.get("inspect"):
+                raise ValueError("Incremental ingestion does not inspect.")
+        return values
+
 
 class AtomisticParseResourceConfig(ResourceConfig):
     """Atomistic parse strategy resource config."""
@@ -80,26 +344,631 @@ class AtomisticStructureParseStrategy:
             session: A session-specific dictionary context.
 
         Returns:
-            key to ase.Atoms object in cache.
+            key to ase.Atoms object in cache, or to the trajectory manifest if
+            a frame `index` is given.
 
         """
         atomistic_config = AtomisticParseConfig(
             **self.parse_config.configuration,
         )
+        instrumentation = get_instrumentation(
+            "parse",
+            atomistic_config.instrument,
+            atomistic_config.instrumentation_hooks,
+        )
+        if atomistic_config.single_flight:
+            record, shared = single_flight(
+                DataCache(atomistic_config.datacache_config),
+                self._flight_key(atomistic_config),
+                lambda: self._get(atomistic_config, instrumentation).dict(),
+                atomistic_config.single_flight_timeout,
+            )
+            result = SessionUpdateAtomisticParse(**record)
+            result.cache_hit = result.cache_hit or shared
+        else:
+            result = self._get(atomistic_config, instrumentation)
+        result.stages = instrumentation.report()
+        return result
+
+    async def aget(
+        self,
+        session: "Optional[Dict[str, Any]]" = None,
+        timeout: "Optional[float]" = None,
+    ) -> SessionUpdateAtomisticParse:
+        """Execute the strategy asynchronously.
+
+        The download and parse run in the thread pool of `oteapi_asmod.aio`, with
+        its concurrency limits.
+
+        Parameters:
+            session: A session-specific dictionary context.
+            timeout: Optional number of seconds after which the call is cancelled
+                and `asyncio.TimeoutError` is raised.
+
+        Returns:
+            The same as `get()`.
+
+        """
+        from oteapi_asmod.aio import run_blocking
+
+        return await run_blocking(self.get, session, timeout=timeout)
+
+    def _get(
+        self,
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> SessionUpdateAtomisticParse:
+        """Download and parse the resources."""
+        if atomistic_config.downloadUrls:
+            return self._bulk_get(atomistic_config, instrumentation)
+        if atomistic_config.incremental:
+            return self._incremental_get(atomistic_config, instrumentation)
+        from oteapi_asmod.aio import check_cancelled
 
         downloader = create_strategy("download", self.parse_config)
-        output = downloader.get()
+        with instrumentation.stage("download"):
+            output = downloader.get()
+        check_cancelled()
+        return self._parse_downloaded(output["key"], instrumentation)
+
+    def _flight_key(self, atomistic_config: AtomisticParseConfig) -> str:
+        """Return the identity of the request, from the resource and options."""
+        request = {
+            "resource": self.parse_config.dict(exclude={"configuration"}),
+            "options": atomistic_config.dict(exclude=_FLIGHT_EXCLUDE),
+        }
+        return gethash(json.dumps(request, sort_keys=True, default=str).encode())
+
+    def _bulk_get(
+        self,
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> SessionUpdateAtomisticParse:
+        """Download and parse `downloadUrl` and all `downloadUrls` concurrently.
+
+        The downloads run in a pool of `download_workers` threads. The parsing
+        runs in a process pool of `processes` workers, which is started for each
+        bulk call, also for `processes=1`, and shut down when all are parsed.
+        """
+        if atomistic_config.downloadUrls is None:
+            raise OteapiAsmodError("A bulk parse requires downloadUrls")
+        configuration = dict(self.parse_config.configuration)
+        configuration.pop("downloadUrls")
+        resource = self.parse_config.dict()
+        urls = [self.parse_config.downloadUrl, *atomistic_config.downloadUrls]
+        resource_configs = [
+            type(self.parse_config)(
+                **dict(resource, downloadUrl=url, configuration=configuration)
+            )
+            for url in urls
+        ]
+
+        with instrumentation.stage("download"), ThreadPoolExecutor(
+            atomistic_config.download_workers
+        ) as executor:
+            keys = list(
+                executor.map(
+                    lambda config: create_strategy("download", config).get()["key"],
+                    resource_configs,
+                )
+            )
+        with ProcessPoolExecutor(atomistic_config.processes) as executor:
+            results = list(executor.map(_parse_downloaded, resource_configs, keys))
+        for result in results:
+            instrumentation.extend(result.stages)
+
+        if atomistic_config.inspect:
+            return SessionUpdateAtomisticParse(
+                **dict(
+                    results[0],
+                    summaries=[result.summary for result in results],
+                    stages=None,
+                )
+            )
+        return SessionUpdateAtomisticParse(
+            **dict(
+                results[0],
+                cached_atoms_keys=[result.cached_atoms_key for result in results],
+                stages=None,
+            )
+        )
+
+    def _incremental_get(
+        self,
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> SessionUpdateAtomisticParse:
+        """Parse the frames of `downloadUrl` that were not ingested before."""
+        cache = DataCache(atomistic_config.datacache_config)
+        key = state_key(
+            str(self.parse_config.downloadUrl),
+            atomistic_config.dict(exclude=_MEMO_EXCLUDE | {"index"}),
+        )
+        state = load_state(cache, key)
+        tail, fileformat = self._incremental_tail(
+            atomistic_config, cache, state, instrumentation
+        )
+        manifest, manifest_key, frames = self._ingest_tail(
+            atomistic_config, cache, state, tail, fileformat, instrumentation
+        )
+
+        end = int(frames.ends[-1]) if len(frames.ends) else tail.start
+        cache.add(
+            IngestState(
+                offset=tail.base + end,
+                nframes=manifest.nframes,
+                manifest_key=manifest_key,
+                checksum=checksum(tail.data, end),
+            ).dict(),
+            key=key,
+        )
+        return SessionUpdateAtomisticParse(
+            cached_atoms_key=manifest_key,
+            nframes=manifest.nframes,
+            parse_path="memory",
+            appended_frames=len(frames.ends),
+        )
+
+    def _incremental_tail(
+        self,
+        atomistic_config: AtomisticParseConfig,
+        cache: DataCache,
+        state: IngestState,
+        instrumentation: "Instrumentation",
+    ) -> "Tuple[Tail, str]":
+        """Return the content of `downloadUrl` not ingested yet, and its format."""
+        from oteapi_asmod.compression import detect_compression
+        from oteapi_asmod.readers import guess_format
+        from oteapi_asmod.xyz import FAST_FORMATS
+
+        url = self.parse_config.downloadUrl
+        with instrumentation.stage("download") as stage:
+            if url.scheme == "file":
+                tail = tail_of_file(Path(url2pathname(url.path)), state)
+            else:
+                downloader = create_strategy("download", self.parse_config)
+                content = cache.get(downloader.get()["key"])
+                if isinstance(content, str):
+                    content = content.encode("utf-8")
+                tail = tail_of_content(content, state)
+            stage.nbytes = len(tail.data) - tail.start
+
+        name = url.path.rsplit("/")[-1]
+        if not tail.resumed and detect_compression(
+            self.parse_config.mediaType, name, tail.data
+        ):
+            raise OteapiAsmodError("Incremental ingestion of compressed content")
+        fileformat = atomistic_config.fileformat or guess_format(
+            name, tail.data[tail.start :]
+        )
+        if fileformat not in FAST_FORMATS:
+            raise OteapiAsmodError(
+                f"Incremental ingestion is only supported for XYZ, not {fileformat}"
+            )
+        return tail, fileformat
+
+    def _ingest_tail(  # pylint: disable=too-many-arguments
+        self,
+        atomistic_config: AtomisticParseConfig,
+        cache: DataCache,
+        state: IngestState,
+        tail: Tail,
+        fileformat: str,
+        instrumentation: "Instrumentation",
+    ) -> "Tuple[TrajectoryManifest, str, XYZFrames]":
+        """Append the complete frames of `tail` to the ingested trajectory.
+
+        Returns:
+            The trajectory manifest, its data cache key and the location of the
+            appended frames in `tail`.
+
+        """
+        from oteapi_asmod.trajectory import load_manifest, store_frames
+        from oteapi_asmod.xyz import iread_xyz, scan_frames
+
+        with instrumentation.stage("scan", nbytes=len(tail.data) - tail.start):
+            frames = scan_frames(tail.data, tail.start, complete_lines=True)
+        manifest = load_manifest(cache, state.manifest_key) if tail.resumed else None
+        with instrumentation.stage("read_and_store") as stage:
+            manifest = store_frames(
+                cache,
+                stage.count(
+                    select_atoms(
+                        iread_xyz(tail.data, ":", fileformat, frames),
+                        atomistic_config.select,
+                    )
+                ),
+                chunksize=atomistic_config.chunksize,
+                index=":",
+                serialization=atomistic_config.serialization,
+                manifest=manifest,
+            )
+            manifest_key = cache.add(manifest.dict())
+        return manifest, manifest_key, frames
+
+    def _parse_downloaded(
+        self, key: str, instrumentation: "Instrumentation"
+    ) -> SessionUpdateAtomisticParse:
+        """Parse the downloaded content stored under `key`, reusing earlier results."""
+        from ase import Atoms
+
+        atomistic_config = AtomisticParseConfig(
+            **self.parse_config.configuration,
+        )
         cache = DataCache(atomistic_config.datacache_config)
-        content = cache.get(output["key"])
+        with instrumentation.stage("cache_get") as stage:
+            content = cache.get(key)
+            stage.nbytes = _nbytes(content)
 
         if isinstance(content, Atoms):
-            return SessionUpdateAtomisticParse(cached_atoms_key=output["key"])
+            if atomistic_config.inspect:
+                return SessionUpdateAtomisticParse(summary=summarize_images([content]))
+            return SessionUpdateAtomisticParse(cached_atoms_key=key)
+
+        content_hash = None
+        if atomistic_config.memoize or atomistic_config.frame_index:
+            with instrumentation.stage("hash", nbytes=_nbytes(content)):
+                content_hash = gethash(
+                    content.encode("utf-8") if isinstance(content, str) else content
+                )
+
+        if atomistic_config.inspect:
+            return self._inspect(
+                cache, key, content, content_hash, atomistic_config, instrumentation
+            )
+
+        memo_key = None
+        if atomistic_config.memoize:
+            with instrumentation.stage("memo"):
+                memo_key = "oteapi-asmod-parse-" + gethash(
+                    {
+                        "content": content_hash,
+                        "options": atomistic_config.dict(exclude=_MEMO_EXCLUDE),
+                    }
+                )
+                memo = cache.get(memo_key) if memo_key in cache else None
+                valid = memo is not None and self._memo_valid(
+                    cache, memo, atomistic_config
+                )
+            if valid:
+                return SessionUpdateAtomisticParse(**memo, cache_hit=True)
 
-        name = self.parse_config.downloadUrl.path.rsplit("/")[-1].split(".")
-        with cache.getfile(
-            key=output["key"], suffix=name[-1], prefix=name[0]
+        result = self._parse(
+            cache, key, content, content_hash, atomistic_config, instrumentation
+        )
+
+        if memo_key is not None:
+            cache.add(
+                {
+                    "cached_atoms_key": result.cached_atoms_key,
+                    "nframes": result.nframes,
+                },
+                key=memo_key,
+            )
+        return result
+
+    def _inspect(  # pylint: disable=too-many-arguments
+        self,
+        cache: DataCache,
+        key: str,
+        content: "Any",
+        content_hash: "Optional[str]",
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> SessionUpdateAtomisticParse:
+        """Summarize the frames of the downloaded `content` stored under `key`.
+
+        XYZ content is summarized from the frame headers and species. Other
+        content, XYZ content the summary does not support and selections of
+        atoms are read by ase.
+        """
+        from oteapi_asmod.xyz import FAST_FORMATS
+
+        compression, fileformat = self._format(content, atomistic_config, guess=True)
+        index = ":" if atomistic_config.index is None else atomistic_config.index
+
+        summary = None
+        if (
+            fileformat in FAST_FORMATS
+            and compression is None
+            and atomistic_config.select is None
+        ):
+            scanned = _scan_xyz(
+                cache,
+                content,
+                content_hash if atomistic_config.frame_index else None,
+                instrumentation,
+            )
+            if scanned is not None:
+                summary = _summarize_xyz(*scanned, fileformat, index, instrumentation)
+
+        if summary is None:
+            with self._reader(
+                cache, key, content, content_hash, atomistic_config, instrumentation
+            ) as (read_frames, _), instrumentation.stage("summarize") as stage:
+                summary = summarize_images(stage.count(read_frames(index)))
+
+        return SessionUpdateAtomisticParse(summary=summary, nframes=summary.nframes)
+
+    def _parse(  # pylint: disable=too-many-arguments
+        self,
+        cache: DataCache,
+        key: str,
+        content: "Any",
+        content_hash: "Optional[str]",
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> SessionUpdateAtomisticParse:
+        """Parse the downloaded `content` stored under `key` and cache the result."""
+        from oteapi_asmod.aio import check_cancelled
+        from oteapi_asmod.arrays import has_arrays, write_arrays
+        from oteapi_asmod.serialize import store_atoms
+
+        with self._reader(
+            cache, key, content, content_hash, atomistic_config, instrumentation
+        ) as (
+            read_frames,
+            parse_path,
+        ):
+            if atomistic_config.index is not None:
+                return _store_trajectory(
+                    cache, read_frames, parse_path, atomistic_config, instrumentation
+                )
+            with instrumentation.stage("read") as stage:
+                atoms = next(read_frames(-1))
+                stage.natoms = len(atoms)
+        check_cancelled()
+        with instrumentation.stage("store", natoms=len(atoms)):
+            key = store_atoms(cache, atoms, atomistic_config.serialization)
+        if atomistic_config.write_arrays and not has_arrays(cache, key):
+            with instrumentation.stage("write_arrays", natoms=len(atoms)):
+                write_arrays(cache, key, atoms)
+
+        return SessionUpdateAtomisticParse(cached_atoms_key=key, parse_path=parse_path)
+
+    @contextmanager
+    def _reader(  # pylint: disable=too-many-arguments
+        self,
+        cache: DataCache,
+        key: str,
+        content: "Any",
+        content_hash: "Optional[str]",
+        atomistic_config: AtomisticParseConfig,
+        instrumentation: "Instrumentation",
+    ) -> "Iterator[Tuple[Callable[[Any], Iterator[Atoms]], str]]":
+        """Provide a reader for the downloaded content.
+
+        XYZ content is read with the fast XYZ reader if enabled, using the frame
+        index if enabled. Otherwise the content is read by ase from memory if
+        possible, or from a temporary file. Compressed content is decompressed
+        while it is read by ase, and never by the fast XYZ reader, which needs
+        all of the decompressed content in memory.
+
+        Yields:
+            A function returning an iterator over the frames selected by a given
+            index, and how the content is read (`"memory"` or `"file"`).
+
+        """
+        from oteapi_asmod.readers import open_stream
+        from oteapi_asmod.xyz import FAST_FORMATS
+
+        compression, fileformat = self._format(
+            content,
+            atomistic_config,
+            guess=atomistic_config.in_memory or atomistic_config.fast_xyz,
+        )
+
+        if (
+            atomistic_config.fast_xyz
+            and fileformat in FAST_FORMATS
+            and compression is None
+        ):
+            scanned = _scan_xyz(
+                cache,
+                content,
+                content_hash if atomistic_config.frame_index else None,
+                instrumentation,
+            )
+            if scanned is not None:
+                yield _xyz_reader(
+                    *scanned, fileformat, atomistic_config.select
+                ), "memory"
+                return
+
+        if atomistic_config.in_memory:
+            stream = open_stream(content, fileformat, compression)
+            if stream is not None:
+                with stream:
+                    yield _ase_reader(
+                        stream, fileformat, atomistic_config.select
+                    ), "memory"
+                return
+
+        with self._getfile(
+            cache, key, content, compression, instrumentation
         ) as filename:
-            atoms = read(filename, format=atomistic_config.fileformat)
-        key = cache.add(atoms, json_encoder=MyEncoder)
+            yield _ase_reader(filename, fileformat, atomistic_config.select), "file"
+
+    @contextmanager
+    def _getfile(
+        self,
+        cache: DataCache,
+        key: str,
+        content: "Any",
+        compression: "Optional[str]",
+        instrumentation: "Instrumentation",
+    ) -> "Iterator[Path]":
+        """Provide the downloaded `content` stored under `key` as a temporary file.
+
+        The temporary file keeps the suffix chain of the name, so that ase can
+        guess the format and decompress the file while reading it.
+        """
+        from oteapi_asmod.compression import split_name
+
+        prefix, dot, extension = split_name(self._name())[0].partition(".")
+        suffix = dot + extension + (f".{compression}" if compression else "")
+        with ExitStack() as stack:
+            with instrumentation.stage("getfile", nbytes=_nbytes(content)):
+                filename = stack.enter_context(
+                    cache.getfile(key=key, suffix=suffix, prefix=f"{prefix}-")
+                )
+            yield filename
+
+    def _name(self) -> str:
+        """Return the file name of the download URL."""
+        return self.parse_config.downloadUrl.path.rsplit("/")[-1]
+
+    def _format(
+        self, content: "Any", atomistic_config: AtomisticParseConfig, guess: bool
+    ) -> "Tuple[Optional[str], Optional[str]]":
+        """Return the compression and the format of the downloaded `content`.
+
+        The format is only guessed if it is not configured and `guess` is true,
+        otherwise it is left to ase.
+        """
+        from oteapi_asmod.compression import detect_compression
+        from oteapi_asmod.readers import guess_format
+
+        name = self._name()
+        compression = detect_compression(self.parse_config.mediaType, name, content)
+        fileformat = atomistic_config.fileformat
+        if fileformat is None and guess:
+            fileformat = guess_format(name, content, compression)
+        return compression, fileformat
+
+    @staticmethod
+    def _memo_valid(
+        cache: DataCache, memo: "Dict[str, Any]", atomistic_config: AtomisticParseConfig
+    ) -> bool:
+        """Return whether the result recorded in `memo` is still in the cache."""
+        from oteapi_asmod.arrays import has_arrays
+
+        key = memo["cached_atoms_key"]
+        if key not in cache:
+            return False
+        if atomistic_config.index is not None:
+            return all(chunk in cache for chunk in cache.get(key)["chunks"])
+        if atomistic_config.write_arrays:
+            return has_arrays(cache, key)
+        return True
+
+
+def _parse_downloaded(
+    parse_config: AtomisticParseResourceConfig, key: str
+) -> SessionUpdateAtomisticParse:
+    """Parse downloaded content in a worker process.
+
+    The stages are recorded without hooks. They are reported by the parent
+    process, together with the stages of the other resources.
+    """
+    strategy = AtomisticStructureParseStrategy(parse_config)
+    instrumentation = get_instrumentation(
+        "parse", AtomisticParseConfig(**parse_config.configuration).instrument
+    )
+    result = strategy._parse_downloaded(  # pylint: disable=protected-access
+        key, instrumentation
+    )
+    result.stages = instrumentation.report()
+    return result
+
+
+def _store_trajectory(
+    cache: DataCache,
+    read_frames: "Callable[[Any], Iterator[Atoms]]",
+    parse_path: str,
+    atomistic_config: AtomisticParseConfig,
+    instrumentation: "Instrumentation",
+) -> SessionUpdateAtomisticParse:
+    """Store the frames selected by the configured index as a trajectory, read
+    with `read_frames` as given by `parse_path`."""
+    from oteapi_asmod.trajectory import store_frames
+
+    # Frames are read while the chunks are stored
+    with instrumentation.stage("read_and_store") as stage:
+        manifest = store_frames(
+            cache,
+            stage.count(read_frames(atomistic_config.index)),
+            chunksize=atomistic_config.chunksize,
+            index=atomistic_config.index,
+            serialization=atomistic_config.serialization,
+        )
+        key = cache.add(manifest.dict())
+    return SessionUpdateAtomisticParse(
+        cached_atoms_key=key, nframes=manifest.nframes, parse_path=parse_path
+    )
+
+
+def _scan_xyz(
+    cache: DataCache,
+    content: "Any",
+    content_hash: "Optional[str]",
+    instrumentation: "Instrumentation",
+) -> "Optional[Tuple[bytes, XYZFrames]]":
+    """Locate the frames of XYZ `content`, using the frame index of the content
+    with `content_hash` if given.
+
+    Returns:
+        The content as bytes and the location of its frames, or `None` if the
+        content is not readable by the fast XYZ reader.
+
+    """
+    from oteapi_asmod.xyz import indexed_frames, scan_frames
+
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    try:
+        with instrumentation.stage("scan", nbytes=len(data)):
+            if content_hash is not None:
+                return data, indexed_frames(cache, data, content_hash)
+            return data, scan_frames(data)
+    except OteapiAsmodError:
+        return None  # Not readable by the fast reader, let ase try
+
+
+def _summarize_xyz(
+    data: bytes,
+    frames: "XYZFrames",
+    fileformat: str,
+    index: "Any",
+    instrumentation: "Instrumentation",
+) -> "Optional[StructureSummary]":
+    """Summarize the frames of XYZ `data` selected by `index`."""
+    from oteapi_asmod.summary import summarize_xyz
+    from oteapi_asmod.xyz import XYZFrames, select_frames
+
+    selected = list(select_frames(len(frames.natoms), index))
+    with instrumentation.stage("summarize") as stage:
+        stage.natoms = int(frames.natoms[selected].sum())
+        return summarize_xyz(
+            data, XYZFrames(*(values[selected] for values in frames)), fileformat
+        )
+
+
+def _xyz_reader(
+    data: bytes,
+    frames: "XYZFrames",
+    fileformat: str,
+    selection: "Optional[AtomSelection]",
+) -> "Callable[[Any], Iterator[Atoms]]":
+    """Return a reader of the frames of XYZ `data` selected by a given index."""
+    from oteapi_asmod.xyz import iread_xyz
+
+    return lambda index: select_atoms(
+        iread_xyz(data, index, fileformat, frames), selection
+    )
+
+
+def _ase_reader(
+    source: "Any", fileformat: "Optional[str]", selection: "Optional[AtomSelection]"
+) -> "Callable[[Any], Iterator[Atoms]]":
+    """Return a reader of the frames read by ase from the file or stream `source`
+    selected by a given index."""
+    from ase.io import iread
+
+    return lambda index: select_atoms(
+        iread(source, index=index, format=fileformat), selection
+    )
+
 
-        return SessionUpdateAtomisticParse(cached_atoms_key=key)
+def _nbytes(content: "Any") -> "Optional[int]":
+    """Return the size of downloaded `content`, if it is bytes or a string."""
+    return len(content) if isinstance(content, (bytes, str)) else None
@@ -0,0 +1,214 @@
+"""Summaries of structure files, for sizing work before parsing.
+
+XYZ and extended XYZ content is summarized from the frame headers and the
+species column only, without converting coordinates or building ase.Atoms
+objects. Other formats are summarized from the frames read by ase, one frame at
+a time.
+"""
+# pylint: disable=import-outside-toplevel
+import io
+from typing import TYPE_CHECKING, Dict, List
+
+from oteapi.models import AttrDict
+from pydantic import Field
+
+if TYPE_CHECKING:
+    from typing import Iterable, Optional
+
+    import numpy as np
+    from ase import Atoms
+
+    from oteapi_asmod.xyz import XYZFrames
+
+
+class StructureSummary(AttrDict):
+    """Summary of the frames of a structure file."""
+
+    nframes: int = Field(0, description="Number of frames.")
+    natoms: List[int] = Field([], description="Number of atoms in each frame.")
+    species: List[str] = Field([], description="Chemical symbols, sorted.")
+    composition: Dict[str, int] = Field(
+        {}, description="Number of atoms of each species, summed over all frames."
+    )
+    has_cell: bool = Field(False, description="Whether any frame has a unit cell.")
+    periodic: bool = Field(
+        False, description="Whether any frame is periodic in any direction."
+    )
+
+
+def summarize_images(images: "Iterable[Atoms]") -> StructureSummary:
+    """Summarize frames read by ase.
+
+    Parameters:
+        images: The frames. Consumed one at a time.
+
+    Returns:
+        The summary.
+
+    """
+    summary = StructureSummary()
+    counts: "Dict[str, int]" = {}
+    for atoms in images:
+        summary.nframes += 1
+        summary.natoms.append(len(atoms))
+        for symbol in atoms.get_chemical_symbols():
+            counts[symbol] = counts.get(symbol, 0) + 1
+        summary.has_cell = summary.has_cell or bool(atoms.cell.rank)
+        summary.periodic = summary.periodic or bool(atoms.pbc.any())
+    return _finish(summary, counts)
+
+
+def summarize_xyz(
+    data: bytes, frames: "XYZFrames", fileformat: str = "extxyz"
+) -> "Optional[StructureSummary]":
+    """Summarize XYZ content from the frame headers and species columns.
+
+    The species of all frames are collected at once, by gathering the first
+    bytes of every atom line. Only frames with the species in another column
+    than the first are tokenized line by line.
+
+    Parameters:
+        data: The XYZ content.
+        frames: The location of the frames, see
+            [`scan_frames()`][oteapi_asmod.xyz.scan_frames].
+        fileformat: Either `"extxyz"` or `"xyz"`. Determines how the comment line
+            is interpreted, as by the ase reader of that format.
+
+    Returns:
+        The summary, or `None` if a frame has no species column.
+
+    """
+    import numpy as np
+
+    summary = StructureSummary(
+        nframes=len(frames.natoms), natoms=frames.natoms.tolist()
+    )
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    if not data.endswith(b"\n"):
+        newlines = np.append(newlines, len(data))
+    # Line number of the header of each frame
+    headers = np.searchsorted(newlines, frames.offsets)
+
+    if fileformat == "extxyz":
+        columns = _species_columns(data, newlines, headers, summary)
+        if columns is None:
+            return None
+    else:
+        columns = np.zeros(len(frames.natoms), dtype=np.int64)
+
+    species = []
+    first = columns == 0
+    if first.any():
+        tokens = _first_tokens(
+            buffer, newlines[_atom_lines(headers[first], frames.natoms[first])] + 1
+        )
+        if tokens is None:
+            first[:] = False
+        else:
+            species.append(tokens)
+    for frame in np.flatnonzero(~first):
+        if frames.natoms[frame] == 0:
+            continue
+        table = np.loadtxt(
+            io.BytesIO(data[newlines[headers[frame] + 1] + 1 : frames.ends[frame]]),
+            dtype="S8",
+            usecols=columns[frame],
+            comments=None,
+            ndmin=1,
+        )
+        species.append(np.ascontiguousarray(table).view(np.uint64))
+    return _finish(summary, _count_tokens(species))
+
+
+def _species_columns(
+    data: bytes,
+    newlines: "np.ndarray",
+    headers: "np.ndarray",
+    summary: StructureSummary,
+) -> "Optional[np.ndarray]":
+    """Return the column of the species in each extended XYZ frame, or `None` if
+    a frame has no species column.
+
+    The cell and periodicity of `summary` are updated from the comment lines.
+    """
+    import numpy as np
+
+    columns = np.zeros(len(headers), dtype=np.int64)
+    for frame, header in enumerate(headers):
+        comment = data[newlines[header] + 1 : newlines[header + 1]]
+        column = _read_comment(comment.decode("utf-8").strip(), summary)
+        if column is None:
+            return None
+        columns[frame] = column
+    return columns
+
+
+def _read_comment(comment: str, summary: StructureSummary) -> "Optional[int]":
+    """Update the cell and periodicity of `summary` from an extended XYZ comment
+    line, and return the column of the species, or `None` if there is none."""
+    import numpy as np
+    from ase.io.extxyz import key_val_str_to_dict
+
+    info = key_val_str_to_dict(comment) if comment else {}
+    pbc = info.get("pbc", [True] * 3 if "Lattice" in info else [False] * 3)
+    summary.has_cell = summary.has_cell or "Lattice" in info
+    summary.periodic = summary.periodic or bool(np.any(pbc))
+    return _species_column(info.get("Properties", "species:S:1:pos:R:3"))
+
+
+def _atom_lines(headers: "np.ndarray", natoms: "np.ndarray") -> "np.ndarray":
+    """Return the line number of each atom line of the frames with the header
+    lines `headers` and `natoms` atoms."""
+    import numpy as np
+
+    return np.repeat(headers + 1, natoms) + (
+        np.arange(natoms.sum()) - np.repeat(np.cumsum(natoms) - natoms, natoms)
+    )
+
+
+def _count_tokens(species: "List[np.ndarray]") -> "Dict[str, int]":
+    """Return the number of atoms of each species, given as 8-byte tokens."""
+    import numpy as np
+
+    counts: "Dict[str, int]" = {}
+    if species:
+        tokens, frequencies = np.unique(np.concatenate(species), return_counts=True)
+        for token, frequency in zip(tokens.view("S8"), frequencies):
+            symbol = token.decode("utf-8").capitalize()
+            counts[symbol] = counts.get(symbol, 0) + int(frequency)
+    return counts
+
+
+def _first_tokens(buffer: "np.ndarray", starts: "np.ndarray") -> "Optional[np.ndarray]":
+    """Return the first token of the lines starting at `starts` as 8-byte integers.
+
+    Returns `None` if any line starts with whitespace.
+    """
+    import numpy as np
+
+    window = buffer[np.minimum(starts[:, None] + np.arange(8), len(buffer) - 1)]
+    whitespace = (window == ord(" ")) | (window == ord("\t"))
+    whitespace |= (window == ord("\n")) | (window == ord("\r"))
+    if whitespace[:, 0].any():
+        return None
+    window[np.logical_or.accumulate(whitespace, axis=1)] = 0
+    return np.ascontiguousarray(window).view(np.uint64).reshape(-1)
+
+
+def _species_column(properties: str) -> "Optional[int]":
+    """Return the column of the species in extended XYZ `Properties`."""
+    fields = properties.split(":")
+    column = 0
+    for name, _, ncols in zip(fields[::3], fields[1::3], fields[2::3]):
+        if name == "species":
+            return column
+        column += int(ncols)
+    return None
+
+
+def _finish(summary: StructureSummary, counts: "Dict[str, int]") -> StructureSummary:
+    """Set the species and composition of `summary` from the species `counts`."""
+    summary.species = sorted(counts)
+    summary.composition = {symbol: counts[symbol] for symbol in summary.species}
+    return summary
@@ -0,0 +1,133 @@
+"""Chunked storage of trajectories (sequences of ase.Atoms) in the data cache.
+
+A trajectory is stored as a number of chunk entries, each holding a list of
+consecutive frames, and a manifest entry listing the chunk keys in order.
+Only the manifest key needs to be passed around between strategies.
+"""
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from oteapi.models import AttrDict
+from pydantic import Field
+
+from oteapi_asmod.aio import check_cancelled
+from oteapi_asmod.serialize import load_atoms, store_atoms
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable, Iterator
+
+    from ase import Atoms
+    from oteapi.datacache import DataCache
+
+
+class TrajectoryManifest(AttrDict):
+    """Manifest of a trajectory stored as chunks in the data cache."""
+
+    manifest: str = Field(
+        "trajectory",
+        description="Type of manifest. Used to recognise manifests in the cache.",
+    )
+    nframes: int = Field(0, description="Total number of frames.")
+    chunks: List[str] = Field(
+        [], description="Data cache keys to the chunks, in frame order."
+    )
+    chunk_frames: List[int] = Field([], description="Number of frames in each chunk.")
+    index: Optional[Union[int, str]] = Field(
+        None, description="The frame index or slice the trajectory was read with."
+    )
+    serialization: str = Field("atoms", description="Serialization of the chunks.")
+
+
+def is_manifest(value: "Any") -> bool:
+    """Return whether `value` is a trajectory manifest read from the cache."""
+    return isinstance(value, dict) and value.get("manifest") == "trajectory"
+
+
+def store_frames(
+    cache: "DataCache",
+    frames: "Iterable[Atoms]",
+    chunksize: int,
+    index: "Optional[Union[int, str]]" = None,
+    serialization: str = "atoms",
+    manifest: "Optional[TrajectoryManifest]" = None,
+) -> "TrajectoryManifest":
+    """Store `frames` in chunks of `chunksize` frames.
+
+    Frames are consumed one at a time, so at most `chunksize` frames are held
+    in memory when `frames` is an iterator.
+
+    If `manifest` is given, the frames are appended to that trajectory as new
+    chunks. The chunks already stored are not touched, so the last of them may
+    hold fewer than `chunksize` frames.
+
+    Parameters:
+        cache: The data cache to store the chunks in.
+        frames: The frames to store.
+        chunksize: Maximum number of frames per chunk.
+        index: The frame index or slice, recorded in the manifest.
+        serialization: Serialization of the chunks, see
+            [`store_atoms()`][oteapi_asmod.serialize.store_atoms]. Ignored if
+            `manifest` is given.
+        manifest: Optional manifest of a stored trajectory to append to. It is
+            not modified.
+
+    Returns:
+        The manifest of the stored trajectory. It is not added to the cache.
+
+    """
+    if chunksize < 1:
+        raise OteapiAsmodError("chunksize must be a positive integer")
+
+    if manifest is None:
+        manifest = TrajectoryManifest(index=index, serialization=serialization)
+    else:
+        manifest = TrajectoryManifest(**manifest.dict())
+    chunk: "List[Atoms]" = []
+    for atoms in frames:
+        check_cancelled()
+        chunk.append(atoms)
+        if len(chunk) == chunksize:
+            _add_chunk(cache, manifest, chunk)
+            chunk = []
+    if chunk:
+        _add_chunk(cache, manifest, chunk)
+    return manifest
+
+
+def _add_chunk(
+    cache: "DataCache", manifest: "TrajectoryManifest", chunk: "List[Atoms]"
+) -> None:
+    """Add a chunk to the cache and register it in the manifest."""
+    manifest.chunks.append(store_atoms(cache, chunk, manifest.serialization))
+    manifest.chunk_frames.append(len(chunk))
+    manifest.nframes += len(chunk)
+
+
+def load_manifest(cache: "DataCache", key: str) -> "TrajectoryManifest":
+    """Return the trajectory manifest stored under `key`."""
+    value = cache.get(key)
+    if not is_manifest(value):
+        raise OteapiAsmodError(f"{key!r} is not a trajectory manifest")
+    return TrajectoryManifest(**value)
+
+
+def iter_frames(cache: "DataCache", key: str) -> "Iterator[Atoms]":
+    """Iterate over the frames of the trajectory with manifest `key`.
+
+    Only one chunk is loaded from the cache at a time.
+    """
+    for chunk in iter_chunks(cache, key):
+        yield from chunk
+
+
+def iter_chunks(cache: "DataCache", key: str) -> "Iterator[List[Atoms]]":
+    """Iterate over the chunks of the trajectory with manifest `key`.
+
+    Yields:
+        The frames of each chunk.
+
+    """
+    manifest = load_manifest(cache, key)
+    for chunk_key in manifest.chunks:
+        check_cancelled()
+        yield load_atoms(cache, chunk_key, manifest.serialization)
@@ -0,0 +1,257 @@
+"""Fast reader for XYZ and extended XYZ files.
+
+The frames are located with a vectorized scan for line breaks, and the atom
+lines of each frame are converted in bulk with `numpy.loadtxt`, instead of line
+by line as in the ase reader. The comment line is interpreted with the ase
+functions, so that the resulting ase.Atoms objects are identical to those
+returned by `ase.io.read`.
+
+Only frames with symbols and positions (the default `Properties` of extended
+XYZ) are read by the fast path. Any other frame is passed on to the ase reader.
+
+The location of the frames can be stored in the data cache as a frame index,
+keyed by the content hash, so that frames of large trajectories can be read
+directly by later parses of the same content.
+"""
+import io
+from typing import TYPE_CHECKING, NamedTuple, cast
+
+import numpy as np
+from ase import Atoms
+from ase.data import atomic_numbers
+from ase.io import read
+from ase.io.extxyz import key_val_str_to_dict, set_calc_and_arrays
+from ase.io.formats import string2index
+
+from oteapi_asmod.utils import OteapiAsmodError
+
+if TYPE_CHECKING:
+    from typing import Iterator, Optional, Union
+
+    from oteapi.datacache import DataCache
+
+FAST_FORMATS = ("extxyz", "xyz")
+"""The ase formats read by the fast reader."""
+
+_DEFAULT_PROPERTIES = "species:S:1:pos:R:3"
+_FRAME_DTYPE = np.dtype([("species", "S8"), ("positions", np.float64, (3,))])
+
+
+class XYZFrames(NamedTuple):
+    """Location of the frames in an XYZ file.
+
+    Attributes:
+        offsets: Byte offset of the first line of each frame.
+        ends: Byte offset just after the last atom line of each frame.
+        natoms: Number of atoms in each frame.
+
+    """
+
+    offsets: np.ndarray
+    ends: np.ndarray
+    natoms: np.ndarray
+
+
+class _Unsupported(Exception):
+    """The frame cannot be read by the fast path."""
+
+
+def scan_frames(data: bytes, start: int = 0, complete_lines: bool = False) -> XYZFrames:
+    """Locate the frames of XYZ content.
+
+    Scanning stops at an empty line where a frame header is expected, at the
+    end of the content or before an incomplete last frame.
+
+    Parameters:
+        data: The XYZ content.
+        start: Byte offset to start scanning from. Must be at a frame header.
+        complete_lines: Whether to only count lines ending with a newline, e.g.
+            for a file that is still being written. By default the end of the
+            content also ends the last line.
+
+    Returns:
+        The location of the frames.
+
+    """
+    newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+    newlines = newlines[newlines >= start]
+    if not complete_lines and not data.endswith(b"\n") and len(data) > start:
+        newlines = np.append(newlines, len(data))
+
+    offsets, ends, natoms = [], [], []
+    line, nlines = 0, len(newlines)
+    begin = start
+    while line < nlines:
+        header = data[begin : newlines[line]].strip()
+        if not header:
+            break
+        try:
+            count = int(header)
+        except ValueError as exc:
+            raise OteapiAsmodError(f"Expected XYZ header, got {header!r}") from exc
+        last = line + 1 + count
+        if last >= nlines:
+            break
+        offsets.append(begin)
+        ends.append(min(newlines[last] + 1, len(data)))
+        natoms.append(count)
+        line = last + 1
+        begin = ends[-1]
+    return XYZFrames(
+        np.array(offsets, dtype=np.int64),
+        np.array(ends, dtype=np.int64),
+        np.array(natoms, dtype=np.int64),
+    )
+
+
+def frame_index_key(content_hash: str) -> str:
+    """Return the data cache key of the frame index of content with a given hash."""
+    return "oteapi-asmod-xyz-index-" + content_hash
+
+
+def indexed_frames(cache: "DataCache", data: bytes, content_hash: str) -> XYZFrames:
+    """Return the location of the frames of `data`, using the frame index.
+
+    The content is scanned only if no frame index is stored for its hash. The
+    result of the scan is then stored as the frame index.
+
+    Parameters:
+        cache: The data cache holding the frame indices.
+        data: The XYZ content.
+        content_hash: Hash of the content, see `frame_index_key()`.
+
+    Returns:
+        The location of the frames.
+
+    """
+    key = frame_index_key(content_hash)
+    if key in cache:
+        return XYZFrames(**cache.get(key))
+    frames = scan_frames(data)
+    cache.add(frames._asdict(), key=key)
+    return frames
+
+
+def select_frames(
+    nframes: int, index: "Optional[Union[int, slice, str]]" = -1
+) -> "range":
+    """Return the frame numbers selected by `index`, as in `ase.io.iread`.
+
+    Parameters:
+        nframes: Total number of frames.
+        index: Frame index or slice, or a string in ase index syntax.
+
+    Returns:
+        The selected frame numbers.
+
+    """
+    if index is None:
+        index = -1
+    if isinstance(index, str):
+        index = cast("Union[int, slice]", string2index(index))
+    if isinstance(index, slice):
+        return range(nframes)[index]
+    if not -nframes <= index < nframes:
+        raise IndexError(f"Frame {index} out of range for {nframes} frames")
+    return range(index % nframes, index % nframes + 1)
+
+
+def iread_xyz(
+    data: bytes,
+    index: "Optional[Union[int, slice, str]]" = -1,
+    fileformat: str = "extxyz",
+    frames: "Optional[XYZFrames]" = None,
+) -> "Iterator[Atoms]":
+    """Iterate over the frames of XYZ content selected by `index`.
+
+    Parameters:
+        data: The XYZ content.
+        index: Frame index or slice, or a string in ase index syntax.
+        fileformat: Either `"extxyz"` or `"xyz"`. Determines how the comment line
+            is interpreted, as by the ase reader of that format.
+        frames: The location of the frames, if already known.
+
+    Yields:
+        The selected frames as ase.Atoms objects.
+
+    """
+    if fileformat not in FAST_FORMATS:
+        raise OteapiAsmodError(f"Unsupported format for fast reader: {fileformat}")
+    if frames is None:
+        frames = scan_frames(data)
+    for frame in select_frames(len(frames.natoms), index):
+        yield read_frame(
+            data,
+            int(frames.offsets[frame]),
+            int(frames.ends[frame]),
+            fileformat,
+        )
+
+
+def read_frame(data: bytes, start: int, end: int, fileformat: str) -> "Atoms":
+    """Read the frame in `data[start:end]`.
+
+    Falls back to the ase reader if the frame is not supported by the fast path.
+    """
+    try:
+        return _read_frame(data, start, end, fileformat)
+    except _Unsupported:
+        return read(
+            io.StringIO(data[start:end].decode("utf-8")), index=0, format=fileformat
+        )
+
+
+def _read_frame(data: bytes, start: int, end: int, fileformat: str) -> "Atoms":
+    """Read a frame with the fast path."""
+    header_end = data.index(b"\n", start)
+    natoms = int(data[start:header_end])
+    comment_end = data.find(b"\n", header_end + 1, end)
+    if natoms == 0 or comment_end < 0:
+        raise _Unsupported
+    comment = data[header_end + 1 : comment_end].decode("utf-8").strip()
+
+    try:
+        table = np.loadtxt(
+            io.BytesIO(data[comment_end + 1 : end]),
+            dtype=_FRAME_DTYPE,
+            comments=None,
+            ndmin=1,
+        )
+    except ValueError as exc:
+        raise _Unsupported from exc
+    if len(table) != natoms:
+        raise _Unsupported
+
+    # Species fit in 8 bytes, so they can be sorted as integers
+    species, inverse = np.unique(
+        np.ascontiguousarray(table["species"]).view(np.uint64), return_inverse=True
+    )
+    numbers = np.array(
+        [
+            atomic_numbers.get(symbol.decode("utf-8").capitalize(), -1)
+            for symbol in species.view("S8")
+        ]
+    )
+    if (numbers < 0).any():
+        raise _Unsupported
+    numbers = numbers[inverse.reshape(-1)]
+
+    if fileformat == "xyz":
+        return Atoms(numbers=numbers, positions=table["positions"])
+
+    info = key_val_str_to_dict(comment) if comment else {}
+    if info.get("Properties", _DEFAULT_PROPERTIES) != _DEFAULT_PROPERTIES:
+        raise _Unsupported
+    info.pop("Properties", None)
+    pbc = None
+    if "pbc" in info:
+        pbc = info.pop("pbc")
+    elif "Lattice" in info:
+        pbc = [True, True, True]
+    cell = info.pop("Lattice").T if "Lattice" in info else None
+
+    atoms = Atoms(
+        numbers=numbers, positions=table["positions"], cell=cell, pbc=pbc, info=info
+    )
+    set_calc_and_arrays(atoms, {})
+    return atoms
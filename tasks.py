@@ -188,3 +188,32 @@ def create_docs_index(_):
         content = content.replace(old, new)
 
     docs_index.write_text(content, encoding="utf8")
+
+
+@task(
+    help={
+        "cases": "Space separated cases given as NATOMSxNFRAMES, e.g. '10x1 100x1000'.",
+        "output": "JSON file for the results.",
+        "baseline": "JSON results of an earlier run to compare to.",
+        "repeat": "Number of runs of each case. The best time is reported.",
+        "memory": "Whether to measure the peak memory of each stage.",
+    }
+)
+def benchmark(
+    context, cases="", output="benchmark.json", baseline="", repeat=1, memory=True
+):
+    """Run the offline benchmarks of the parse and ASE to DLite pipeline."""
+    command = [
+        sys.executable,
+        str(TOP_DIR / "benchmarks" / "pipeline.py"),
+        f"--output={output}",
+        f"--repeat={repeat}",
+    ]
+    if cases:
+        command.append("--cases")
+        command.extend(cases.split())
+    if baseline:
+        command.append(f"--baseline={baseline}")
+    if not memory:
+        command.append("--no-memory")
+    context.run(" ".join(command), pty=True)
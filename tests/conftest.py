@@ -1,8 +1,14 @@
 """Pytest fixtures for `strategies/`."""
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import pytest
 
+if TYPE_CHECKING:
+    from typing import Callable
+
+    from oteapi_asmod.strategies.parse import SessionUpdateAtomisticParse
+
 
 @pytest.fixture(scope="session", autouse=True)
 def load_plugins() -> None:
@@ -16,3 +22,27 @@ def load_plugins() -> None:
 def repo_dir() -> Path:
     """Absolute path to the repository directory."""
     return Path(__file__).parent.parent.resolve()
+
+
+@pytest.fixture
+def parse(tmp_path: Path) -> "Callable[..., SessionUpdateAtomisticParse]":
+    """Function parsing a structure file with the atomistic parse strategy.
+
+    It takes the path of the file and the configuration options as keyword
+    arguments. The data cache is in the `cache` directory of `tmp_path`.
+    """
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    def parse_file(path: Path, **configuration) -> "SessionUpdateAtomisticParse":
+        config = ResourceConfig(
+            downloadUrl=path.as_uri(),
+            mediaType="chemical/x-xyz",
+            configuration=dict(
+                configuration, datacache_config={"cacheDir": str(tmp_path / "cache")}
+            ),
+        )
+        return AtomisticStructureParseStrategy(config).get()
+
+    return parse_file
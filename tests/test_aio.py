@@ -0,0 +1,77 @@
+"""Test the asynchronous execution of the strategies."""
+
+
+def test_aget(repo_dir: "Path", tmp_path: "Path") -> None:
+    """Test that concurrent asynchronous parses keep the event loop running."""
+    import asyncio
+
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.aio import configure
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    configure(max_workers=2, max_pending=2)
+    config = ResourceConfig(
+        downloadUrl=(repo_dir / "tests" / "testfiles" / "Ethane.xyz").as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={
+            "memoize": False,
+            "single_flight": False,
+            "datacache_config": {"cacheDir": str(tmp_path / "cache")},
+        },
+    )
+    expected = AtomisticStructureParseStrategy(config).get()
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        results = await asyncio.gather(
+            *[AtomisticStructureParseStrategy(config).aget() for _ in range(5)]
+        )
+        ticker.cancel()
+        return results, ticks
+
+    try:
+        results, ticks = asyncio.run(main())
+    finally:
+        configure()
+    assert ticks > 5
+    assert all(
+        result.cached_atoms_key == expected.cached_atoms_key for result in results
+    )
+
+
+def test_timeout() -> None:
+    """Test that a timeout cancels the work in the thread."""
+    import asyncio
+    import threading
+    import time
+
+    import pytest
+
+    from oteapi_asmod.aio import OperationCancelled, check_cancelled, run_blocking
+
+    stopped = threading.Event()
+
+    def work():
+        try:
+            while True:
+                check_cancelled()
+                time.sleep(0.01)
+        except OperationCancelled:
+            stopped.set()
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_blocking(work, timeout=0.1))
+    assert stopped.wait(5)
+
+    # Outside an asynchronous call nothing is cancelled
+    check_cancelled()
@@ -0,0 +1,87 @@
+"""Test the process-local cache of decoded ase.Atoms."""
+
+
+def test_atoms_cache_bound() -> None:
+    """Test eviction by atom count, statistics and invalidation."""
+    from ase.build import molecule
+
+    from oteapi_asmod.atomscache import AtomsCache
+
+    cache = AtomsCache(max_atoms=24)
+    ethane = molecule("C2H6")  # 8 atoms
+    cache.put("a", ethane, "atoms")
+    cache.put("b", [ethane, ethane], "npz")
+    assert cache.get("a") is ethane
+    assert cache.get("a", "npz") is None
+
+    # Evicts "b", the least recently used entry
+    cache.put("c", ethane, "atoms")
+    assert cache.get("b") is None
+    assert cache.get("c", "atoms") is ethane
+    # Too large to be cached
+    cache.put("d", [ethane] * 4, "npz")
+    assert cache.get("d") is None
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 4,
+        "evictions": 1,
+        "entries": 1,
+        "natoms": 8,
+        "max_atoms": 24,
+    }
+
+    cache.resize(0)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["evictions"] == 2
+
+
+def test_atoms_cache_pipeline(  # pylint: disable=too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test that a function reuses the atoms decoded by a parse."""
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.atomscache import ATOMS_CACHE
+    from oteapi_asmod.serialize import cached_atoms, load_atoms
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    config = ResourceConfig(
+        downloadUrl=(repo_dir / "tests" / "testfiles" / "Ethane.xyz").as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"serialization": "npz", "datacache_config": datacache_config},
+    )
+    key = AtomisticStructureParseStrategy(config).get().cached_atoms_key
+    cache = DataCache(datacache_config)
+    atoms = load_atoms(cache, key)
+
+    hits = ATOMS_CACHE.stats()["hits"]
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    function_config = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "molecule",
+            "datacacheKey": key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+            "datacache_config": datacache_config,
+        },
+    )
+    ASEDliteFunctionStrategy(function_config).get(session)
+    assert ATOMS_CACHE.stats()["hits"] == hits + 1
+
+    # Decoded atoms are dropped when the key leaves the data cache
+    assert cached_atoms(cache, key) is atoms
+    del cache[key]
+    assert cached_atoms(cache, key) is None
+    assert ATOMS_CACHE.get(key) is None
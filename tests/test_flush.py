@@ -0,0 +1,61 @@
+"""Test writing the session collection to DLite storage."""
+
+
+def test_collection_flush(  # pylint: disable=too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test full, incremental and background flushes of a collection."""
+    from dlite import Collection, Instance, Storage
+    from oteapi.models import SessionUpdate
+
+    from oteapi_asmod.flush import wait_for_flushes
+    from oteapi_asmod.strategies.function import (
+        CollectionFlushFunctionConfig,
+        CollectionFlushFunctionStrategy,
+    )
+
+    metadata = Instance.from_location(
+        "json", str(repo_dir / "tests" / "testfiles" / "Molecule.json")
+    )
+    coll = Collection()
+    instances = [metadata(dimensions=[2, 3]) for _ in range(5)]
+    for index, inst in enumerate(instances[:3]):
+        coll.add(label=f"molecule-{index}", inst=inst)
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    location = tmp_path / "collection.json"
+
+    def flush(**configuration):
+        config = CollectionFlushFunctionConfig(
+            functionType="flush/collection",
+            configuration={
+                "location": str(location),
+                "datacache_config": {"cacheDir": str(tmp_path / "cache")},
+                **configuration,
+            },
+        )
+        return CollectionFlushFunctionStrategy(config).get(session)
+
+    def stored():
+        with Storage("json", str(location), "mode=r") as storage:
+            return set(storage.get_uuids())
+
+    assert flush(incremental=True).labels == [f"molecule-{i}" for i in range(3)]
+    assert stored() == {inst.uuid for inst in instances[:3]} | {coll.uuid}
+
+    coll.add(label="molecule-3", inst=instances[3])
+    assert flush(incremental=True).labels == ["molecule-3"]
+    assert stored() == {inst.uuid for inst in instances[:4]} | {coll.uuid}
+
+    coll.add(label="molecule-4", inst=instances[4])
+    assert flush(incremental=True, background=True).labels == ["molecule-4"]
+    wait_for_flushes()
+    assert stored() == {inst.uuid for inst in instances} | {coll.uuid}
+    assert flush(incremental=True).labels == []
+    restored = Collection.from_location("json", str(location), id=coll.uuid)
+    assert sorted(restored.get_labels()) == [f"molecule-{i}" for i in range(5)]
+
+    # A full flush overwrites the storage
+    location.write_text("{}")
+    assert len(flush(save_collection=False).labels) == 5
+    assert stored() == {inst.uuid for inst in instances}
@@ -13,7 +13,7 @@ def test_ASEDlite(  # pylint: disable=invalid-name, too-many-locals
     from oteapi.models.resourceconfig import ResourceConfig
 
     from oteapi_asmod.strategies.function import (
-        ASEDliteConfig,
+        ASEDliteFunctionConfig,
         ASEDliteFunctionStrategy,
     )
     from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
@@ -38,8 +38,13 @@ def test_ASEDlite(  # pylint: disable=invalid-name, too-many-locals
     session.update(SessionUpdate(collection_id=coll.uuid))
     # Define configuration for the function
     modelpath = repo_dir / "tests" / "testfiles" / "Molecule.json"
-    config2 = ASEDliteConfig(
-        label="molecule", datacacheKey=parsed_atoms_key, datamodel=modelpath
+    config2 = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "molecule",
+            "datacacheKey": parsed_atoms_key,
+            "datamodel": modelpath,
+        },
     )
 
     # Instantiate function
@@ -59,3 +64,341 @@ def test_ASEDlite(  # pylint: disable=invalid-name, too-many-locals
     assert np.array_equal(
         dlite_instance.symbols, ["H", "C", "H", "H", "C", "H", "H", "H"]
     )
+
+
+def test_ASEDlite_npz(repo_dir: "Path") -> None:  # pylint: disable=invalid-name
+    """Test converting ase.Atoms stored with the `npz` serialization."""
+    import numpy as np
+    from dlite import Collection
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"serialization": "npz"},
+    )
+    parsed_atoms_key = AtomisticStructureParseStrategy(config).get().cached_atoms_key
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    config2 = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "molecule",
+            "datacacheKey": parsed_atoms_key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+            "serialization": "npz",
+        },
+    )
+    ASEDliteFunctionStrategy(config2).get(session)
+
+    dlite_instance = coll.get("molecule")
+    assert np.array_equal(
+        dlite_instance.symbols, ["H", "C", "H", "H", "C", "H", "H", "H"]
+    )
+
+
+def test_ASEDlite_arrays(  # pylint: disable=invalid-name, too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test converting atoms from memory-mapped array files."""
+    import numpy as np
+    from ase.io import read
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.arrays import (
+        ARRAY_DTYPES,
+        arrays_dir,
+        open_arrays,
+        prune_arrays,
+        write_arrays,
+    )
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"write_arrays": True, "datacache_config": datacache_config},
+    )
+    parsed_atoms_key = AtomisticStructureParseStrategy(config).get().cached_atoms_key
+    arrays = open_arrays(cache, parsed_atoms_key)
+    assert isinstance(arrays["positions"], np.memmap)
+    assert not arrays["positions"].flags.writeable
+
+    # Rewriting replaces the files, leaving open memory maps intact
+    positions = np.array(arrays["positions"])
+    write_arrays(cache, parsed_atoms_key, read(filepath))
+    assert np.array_equal(arrays["positions"], positions)
+    directory = arrays_dir(cache, parsed_atoms_key)
+    names = {path.name for path in directory.iterdir()}
+    assert names == {*ARRAY_DTYPES, "arrays.json"}
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    config2 = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "molecule",
+            "datacacheKey": parsed_atoms_key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+            "datacache_config": datacache_config,
+        },
+    )
+    ASEDliteFunctionStrategy(config2).get(session)
+
+    atoms = read(filepath)
+    dlite_instance = coll.get("molecule")
+    assert np.array_equal(dlite_instance.symbols, atoms.get_chemical_symbols())
+    assert np.array_equal(dlite_instance.masses, atoms.get_masses())
+    assert np.array_equal(dlite_instance.positions, atoms.positions)
+
+    # The arrays of expired atoms are not served, and their files are removed
+    write_arrays(cache, "expired", atoms)
+    assert prune_arrays(cache) == 1
+    assert not arrays_dir(cache, "expired").exists()
+    del cache[parsed_atoms_key]
+    assert open_arrays(cache, parsed_atoms_key) is None
+    assert not directory.exists()
+
+
+def test_ASEDlite_batch(  # pylint: disable=invalid-name, too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test converting all frames of a trajectory in one function call."""
+    import numpy as np
+    from ase.build import molecule
+    from ase.io import write
+    from dlite import Collection
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    frames = [molecule(name) for name in ("H2O", "CH4", "C2H6")]
+    filepath = tmp_path / "frames.xyz"
+    write(filepath, frames)
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"index": ":", "chunksize": 2, "serialization": "npz"},
+    )
+    manifest_key = AtomisticStructureParseStrategy(config).get().cached_atoms_key
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    config2 = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "frame{index}",
+            "datacacheKey": manifest_key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+        },
+    )
+    output = ASEDliteFunctionStrategy(config2).get(session)
+    assert output.labels == ["frame0", "frame1", "frame2"]
+
+    for label, atoms in zip(output.labels, frames):
+        dlite_instance = coll.get(label)
+        assert np.array_equal(dlite_instance.symbols, atoms.get_chemical_symbols())
+        assert np.allclose(dlite_instance.masses, atoms.get_masses())
+        assert np.allclose(dlite_instance.positions, atoms.positions)
+
+    # Braces other than `{index}` are kept in the labels
+    config3 = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "mol-{name}",
+            "datacacheKey": manifest_key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+        },
+    )
+    output = ASEDliteFunctionStrategy(config3).get(session)
+    assert output.labels == ["mol-{name}-0", "mol-{name}-1", "mol-{name}-2"]
+
+
+def test_DliteASE(  # pylint: disable=invalid-name, too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test converting dlite molecule instances back to ase.Atoms."""
+    import numpy as np
+    from ase.build import molecule
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import FunctionConfig, SessionUpdate
+    from oteapi.plugins import create_strategy
+
+    from oteapi_asmod.serialize import load_atoms, store_atoms
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+        DliteASEFunctionStrategy,
+    )
+
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+    frames = [molecule("H2O"), molecule("C2H6")]
+    frames[1].set_masses([12.5] + [1.0] * 7)
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    ASEDliteFunctionStrategy(
+        ASEDliteFunctionConfig(
+            functionType="asedlite/atoms",
+            configuration={
+                "label": "molecule-{index}",
+                "datacacheKeys": [store_atoms(cache, atoms) for atoms in frames],
+                "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+                "datacache_config": datacache_config,
+            },
+        )
+    ).get(session)
+
+    output = create_strategy(
+        "function",
+        FunctionConfig(
+            functionType="dlitease/atoms",
+            configuration={
+                "labels": ["molecule-0", "molecule-1"],
+                "datacache_config": datacache_config,
+            },
+        ),
+    ).get(session)
+    assert output.cached_atoms_key == output.cached_atoms_keys[0]
+    for key, atoms in zip(output.cached_atoms_keys, frames):
+        converted = load_atoms(cache, key)
+        assert converted.get_chemical_symbols() == atoms.get_chemical_symbols()
+        assert np.allclose(converted.positions, atoms.positions)
+        assert np.allclose(converted.get_masses(), atoms.get_masses())
+    assert "masses" not in load_atoms(cache, output.cached_atoms_keys[0]).arrays
+
+    # The positions of the rebuilt atoms are views of the instance arrays
+    inst = coll.get("molecule-1")
+    atoms_from_instance = (
+        DliteASEFunctionStrategy._atoms_from_instance  # pylint: disable=protected-access
+    )
+    atoms = atoms_from_instance(inst)
+    assert np.shares_memory(atoms.positions, inst.positions)
+
+
+def test_ASEDlite_trajectory(  # pylint: disable=invalid-name, too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test converting a trajectory manifest to one Trajectory instance."""
+    import numpy as np
+    from ase.build import molecule
+    from ase.calculators.singlepoint import SinglePointCalculator
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import SessionUpdate
+
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.trajectory import store_frames
+
+    frames = []
+    for i in range(5):
+        atoms = molecule("C2H6", cell=[5.0 + i, 5.0, 5.0])
+        atoms.rattle(0.1, seed=i)
+        if i != 3:
+            atoms.calc = SinglePointCalculator(atoms, energy=-1.0 * i)
+        frames.append(atoms)
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+    manifest_key = cache.add(
+        store_frames(cache, frames, chunksize=2, serialization="npz").dict()
+    )
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    output = ASEDliteFunctionStrategy(
+        ASEDliteFunctionConfig(
+            functionType="asedlite/atoms",
+            configuration={
+                "label": "trajectory",
+                "datacacheKey": manifest_key,
+                "datamodel": repo_dir / "tests" / "testfiles" / "Trajectory.json",
+                "trajectory": True,
+                "datacache_config": datacache_config,
+            },
+        )
+    ).get(session)
+    assert output.labels == ["trajectory"]
+
+    inst = coll.get("trajectory")
+    assert list(inst.symbols) == frames[0].get_chemical_symbols()
+    assert np.allclose(inst.masses, frames[0].get_masses())
+    assert np.allclose(inst.positions, [atoms.positions for atoms in frames])
+    assert np.allclose(inst.cells, [atoms.cell.array for atoms in frames])
+    assert np.allclose(inst.energies, [0.0, -1.0, -2.0, np.nan, -4.0], equal_nan=True)
+
+
+def test_ASEDlite_properties(  # pylint: disable=invalid-name, too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test filling only some properties, with single precision positions."""
+    import numpy as np
+    from ase.build import molecule
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import SessionUpdate
+
+    from oteapi_asmod.serialize import store_atoms
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+
+    atoms = molecule("C2H6")
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    key = store_atoms(DataCache(datacache_config), atoms, "npz")
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    ASEDliteFunctionStrategy(
+        ASEDliteFunctionConfig(
+            functionType="asedlite/atoms",
+            configuration={
+                "label": "molecule",
+                "datacacheKey": key,
+                "datamodel": repo_dir / "tests" / "testfiles" / "Positions.json",
+                "properties": ["symbols", "positions"],
+                "positions_dtype": "float32",
+                "datacache_config": datacache_config,
+            },
+        )
+    ).get(session)
+
+    inst = coll.get("molecule")
+    assert list(inst.symbols) == atoms.get_chemical_symbols()
+    assert inst.positions.dtype == np.float32
+    assert np.allclose(inst.positions, atoms.positions, atol=1e-6)
@@ -0,0 +1,29 @@
+"""Test the import cost of the plugin."""
+
+# Import time of the strategy modules on top of oteapi, in seconds. Loading
+# ase, numpy and dlite takes several times longer.
+MAX_IMPORT_TIME = 0.5
+
+
+def test_strategy_imports_are_light() -> None:
+    """Importing the strategies must not load ase, numpy or dlite."""
+    import json
+    import subprocess
+    import sys
+
+    script = """
+import json, sys, time
+import oteapi.datacache, oteapi.models, oteapi.plugins, pydantic
+start = time.perf_counter()
+import oteapi_asmod.strategies.function, oteapi_asmod.strategies.parse
+duration = time.perf_counter() - start
+heavy = [name for name in ("ase", "dlite", "numpy") if name in sys.modules]
+print(json.dumps({"duration": duration, "heavy": heavy}))
+"""
+    result = json.loads(
+        subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, check=True, text=True
+        ).stdout
+    )
+    assert result["heavy"] == []
+    assert result["duration"] < MAX_IMPORT_TIME
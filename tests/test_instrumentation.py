@@ -0,0 +1,102 @@
+"""Test the instrumentation of the strategies."""
+
+
+def test_instrumented_pipeline(  # pylint: disable=too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test that stages are returned and passed to a registered hook."""
+    from dlite import Collection
+    from oteapi.models import SessionUpdate
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.instrumentation import register_hook
+    from oteapi_asmod.strategies.function import (
+        ASEDliteFunctionConfig,
+        ASEDliteFunctionStrategy,
+    )
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    observed = []
+    register_hook("test", observed.append)
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
+
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={
+            "instrument": True,
+            "instrumentation_hooks": ["test", "logging"],
+            "datacache_config": datacache_config,
+        },
+    )
+    parsed = AtomisticStructureParseStrategy(config).get()
+    stages = {record["stage"]: record for record in parsed.stages}
+    assert list(stages) == [
+        "download",
+        "cache_get",
+        "hash",
+        "memo",
+        "scan",
+        "read",
+        "store",
+    ]
+    assert stages["cache_get"]["nbytes"] == filepath.stat().st_size
+    assert stages["read"]["natoms"] == 8
+    assert observed == parsed.stages
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    function_config = ASEDliteFunctionConfig(
+        functionType="asedlite/atoms",
+        configuration={
+            "label": "molecule",
+            "datacacheKey": parsed.cached_atoms_key,
+            "datamodel": repo_dir / "tests" / "testfiles" / "Molecule.json",
+            "datacache_config": datacache_config,
+            "instrument": True,
+        },
+    )
+    output = ASEDliteFunctionStrategy(function_config).get(session)
+    stages = {record["stage"]: record for record in output.stages}
+    assert stages["load"]["natoms"] == 8
+    assert stages["collection_add"]["calls"] == 1
+    assert all(record["strategy"] == "function" for record in output.stages)
+
+    # Instrumentation is disabled by default
+    config.configuration = {"datacache_config": datacache_config}
+    assert AtomisticStructureParseStrategy(config).get().stages is None
+
+
+def test_instrumentation_accumulates() -> None:
+    """Test that repeated stages are accumulated and the no-op instrumentation."""
+    from oteapi_asmod.instrumentation import NULL_INSTRUMENTATION, get_instrumentation
+
+    instrumentation = get_instrumentation("test", True)
+    for natoms in (2, 3):
+        with instrumentation.stage("step", natoms=natoms):
+            pass
+    with instrumentation.stage("count") as stage:
+        assert sum(len(atoms) for atoms in stage.count(["ab", "cde"])) == 5
+    records = instrumentation.report()
+    assert [record["stage"] for record in records] == ["step", "count"]
+    assert records[0]["calls"] == 2
+    assert records[0]["natoms"] == 5
+    assert records[1]["natoms"] == 5
+
+    assert get_instrumentation("test", False) is NULL_INSTRUMENTATION
+    with NULL_INSTRUMENTATION.stage("step") as stage:
+        stage.natoms = 1
+    assert NULL_INSTRUMENTATION.report() is None
+
+
+def test_unknown_hook() -> None:
+    """Test that hooks cannot be given as import paths."""
+    import pytest
+
+    from oteapi_asmod.instrumentation import get_instrumentation
+    from oteapi_asmod.utils import OteapiAsmodError
+
+    with pytest.raises(OteapiAsmodError, match="Unknown instrumentation hook"):
+        get_instrumentation("test", True, ["os:system"])
@@ -0,0 +1,39 @@
+"""Test the DLite metadata registry."""
+
+
+def test_metadata_registry(repo_dir: "Path", tmp_path: "Path") -> None:
+    """Test hits, misses and eviction of the registry."""
+    import json
+
+    from oteapi_asmod.metadata import MetadataRegistry
+
+    entity = json.loads(
+        (repo_dir / "tests" / "testfiles" / "Molecule.json").read_text(encoding="utf8")
+    )
+    modelpath = tmp_path / "Molecule.json"
+    modelpath.write_text(json.dumps(entity), encoding="utf8")
+
+    registry = MetadataRegistry(maxsize=1)
+    metadata = registry.get(modelpath)
+    assert registry.get(modelpath) is metadata
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 1
+
+    # DLite keeps the metadata of a URI, a changed entity needs a new version
+    entity["description"] = "A changed description"
+    modelpath.write_text(json.dumps(entity), encoding="utf8")
+    reloaded = MetadataRegistry().get(modelpath)
+    assert reloaded.description == metadata.description
+    newpath = tmp_path / "Molecule-0.2.json"
+    newpath.write_text(json.dumps(dict(entity, version="0.2")), encoding="utf8")
+    changed = registry.get(newpath)
+    assert changed.uri.endswith("/0.2/Molecule")
+    assert changed.description == "A changed description"
+    assert registry.evictions == 1
+
+    # A second datamodel evicts the first one
+    otherpath = tmp_path / "Other.json"
+    otherpath.write_text(json.dumps(dict(entity, name="Other")), encoding="utf8")
+    registry.get(otherpath)
+    assert registry.evictions == 2
+    assert len(registry) == 1
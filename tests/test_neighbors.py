@@ -0,0 +1,127 @@
+"""Test the neighbor lists."""
+
+
+def test_neighbor_list() -> None:  # pylint: disable=too-many-locals
+    """Test the CSR neighbor list against all pairs of a periodic structure."""
+    import numpy as np
+    from ase.build import bulk, molecule
+
+    from oteapi_asmod.neighbors import neighbor_list
+
+    atoms = bulk("Cu", cubic=True).repeat(2)
+    atoms.rattle(0.05, seed=1)
+    cutoff = 3.0
+    neighbors = neighbor_list(atoms, cutoff)
+    assert len(neighbors.indptr) == len(atoms) + 1
+
+    # All pairs of atoms in the cell and its 26 neighbor images
+    grid = np.array(np.meshgrid(*[[-1, 0, 1]] * 3)).T.reshape(-1, 3)
+    expected = set()
+    for i, position in enumerate(atoms.positions):
+        for j, other in enumerate(atoms.positions):
+            for shift in grid:
+                distance = np.linalg.norm(other + shift @ atoms.cell - position)
+                if 0 < distance < cutoff:
+                    expected.add((i, j, *shift))
+    found = set()
+    for i in range(len(atoms)):
+        start, stop = neighbors.indptr[i : i + 2]
+        for j, shift in zip(
+            neighbors.indices[start:stop], neighbors.shifts[start:stop]
+        ):
+            found.add((i, j, *shift))
+    assert found == expected
+
+    first, second, distances = neighbors.bonds()
+    assert len(first) == len(expected) // 2
+    assert np.all(first <= second)
+    assert np.allclose(np.sort(distances), np.sort(neighbors.distances)[::2])
+
+    # A molecule without a cell
+    neighbors = neighbor_list(molecule("C2H6"), 1.6)
+    first, second, _ = neighbors.bonds()
+    assert len(first) == 7
+
+
+def test_neighbor_list_function(  # pylint: disable=too-many-locals
+    repo_dir: "Path", tmp_path: "Path"
+) -> None:
+    """Test the neighbor list function strategy with cached results."""
+    import numpy as np
+    from ase.build import bulk, molecule
+    from dlite import Collection
+    from oteapi.datacache import DataCache
+    from oteapi.models import SessionUpdate
+
+    from oteapi_asmod.neighbors import load_neighbors
+    from oteapi_asmod.serialize import store_atoms
+    from oteapi_asmod.strategies.function import (
+        NeighborListFunctionConfig,
+        NeighborListFunctionStrategy,
+    )
+
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+    key = store_atoms(cache, [molecule("C2H6"), bulk("Cu", cubic=True)], "npz")
+
+    coll = Collection()
+    session = {}
+    session.update(SessionUpdate(collection_id=coll.uuid))
+    bond_table = repo_dir / "tests" / "testfiles" / "BondTable.json"
+    config = NeighborListFunctionConfig(
+        functionType="neighbors/atoms",
+        configuration={
+            "datacacheKey": key,
+            "cutoff": 2.6,
+            "datamodel": bond_table,
+            "label": "bonds",
+            "datacache_config": datacache_config,
+        },
+    )
+    output = NeighborListFunctionStrategy(config).get(session)
+    assert not output.cache_hit
+    assert output.labels == ["bonds-0", "bonds-1"]
+    # Each Cu atom has 12 nearest neighbors
+    assert output.nneighbors[1] == 4 * 12
+    lists, batch = load_neighbors(cache, output.neighbors_key)
+    assert batch
+    assert [len(neighbors.indices) for neighbors in lists] == output.nneighbors
+
+    table = coll.get("bonds-1")
+    assert len(table.first) == 4 * 12 // 2
+    assert np.allclose(table.distances, 3.61 / np.sqrt(2), atol=1e-2)
+
+    other_coll = Collection()
+    session.update(SessionUpdate(collection_id=other_coll.uuid))
+    again = NeighborListFunctionStrategy(config).get(session)
+    assert again.cache_hit
+    assert again.neighbors_key == output.neighbors_key
+    assert again.labels == output.labels
+
+    # A list of one frame is a batch, also when loaded from the cache
+    single = NeighborListFunctionConfig(
+        functionType="neighbors/atoms",
+        configuration={
+            "datacacheKey": store_atoms(cache, [molecule("C2H6")], "npz"),
+            "cutoff": 1.6,
+            "datamodel": bond_table,
+            "label": "single",
+            "datacache_config": datacache_config,
+        },
+    )
+    for collection in (Collection(), Collection()):
+        session.update(SessionUpdate(collection_id=collection.uuid))
+        assert NeighborListFunctionStrategy(single).get(session).labels == ["single-0"]
+
+    config = NeighborListFunctionConfig(
+        functionType="neighbors/atoms",
+        configuration={
+            "datacacheKey": key,
+            "cutoff": 3.0,
+            "datacache_config": datacache_config,
+        },
+    )
+    other = NeighborListFunctionStrategy(config).get()
+    assert not other.cache_hit
+    assert other.neighbors_key != output.neighbors_key
+    assert other.labels == []
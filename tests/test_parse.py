@@ -29,3 +29,455 @@ def test_xyz_read(repo_dir: "Path") -> None:
     filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
     atoms = read(filepath)
     assert atoms == parsed_atoms
+
+
+def test_xyz_trajectory_read(  # pylint: disable=too-many-locals
+    tmp_path: "Path",
+) -> None:
+    """Test reading a strided frame slice of a trajectory into chunks."""
+    from ase.build import molecule
+    from ase.io import read, write
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+    from oteapi_asmod.trajectory import iter_frames, load_manifest
+
+    frames = []
+    for i in range(10):
+        atoms = molecule("C2H6")
+        atoms.positions += 0.1 * i
+        frames.append(atoms)
+    filepath = tmp_path / "trajectory.xyz"
+    write(filepath, frames)
+
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"index": "1::2", "chunksize": 2},
+    )
+    session = AtomisticStructureParseStrategy(config).get()
+    assert session.nframes == 5
+
+    cache = DataCache()
+    manifest = load_manifest(cache, session.cached_atoms_key)
+    assert manifest.chunk_frames == [2, 2, 1]
+    assert list(iter_frames(cache, session.cached_atoms_key)) == read(
+        filepath, index="1::2"
+    )
+
+
+def test_parse_memoization(
+    repo_dir: "Path", tmp_path: "Path", parse: "Callable"
+) -> None:
+    """Test that parsing identical content with the same options is reused."""
+    import shutil
+
+    filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
+    copypath = tmp_path / "Ethane-copy.xyz"
+    shutil.copyfile(filepath, copypath)
+
+    first = parse(filepath, serialization="npz")
+    assert not first.cache_hit
+    second = parse(copypath, serialization="npz")
+    assert second.cache_hit
+    assert second.cached_atoms_key == first.cached_atoms_key
+
+    assert not parse(filepath, serialization="atoms").cache_hit
+    assert not parse(filepath, serialization="npz", memoize=False).cache_hit
+
+
+def test_parse_in_memory(repo_dir: "Path", tmp_path: "Path") -> None:
+    """Test that parsing from memory and from a temporary file agree."""
+    from ase.io import read
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    filepath = repo_dir / "tests" / "testfiles" / "Ethane.xyz"
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+
+    for in_memory, parse_path in ((True, "memory"), (False, "file")):
+        config = ResourceConfig(
+            downloadUrl=filepath.as_uri(),
+            mediaType="chemical/x-xyz",
+            configuration={
+                "in_memory": in_memory,
+                "fast_xyz": False,
+                "memoize": False,
+                "datacache_config": datacache_config,
+            },
+        )
+        output = AtomisticStructureParseStrategy(config).get()
+        assert output.parse_path == parse_path
+        assert cache.get(output.cached_atoms_key) == read(filepath)
+
+
+def test_parse_no_extension(repo_dir: "Path", tmp_path: "Path") -> None:
+    """Test guessing the format from the content of a URL without extension."""
+    from ase.io import read
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    filepath = tmp_path / "noext" / "structure"
+    filepath.parent.mkdir()
+    filepath.write_bytes((repo_dir / "tests" / "testfiles" / "Ethane.xyz").read_bytes())
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"datacache_config": datacache_config},
+    )
+    output = AtomisticStructureParseStrategy(config).get()
+    atoms = DataCache(datacache_config).get(output.cached_atoms_key)
+    assert (
+        atoms.get_chemical_symbols()
+        == read(filepath, format="xyz").get_chemical_symbols()
+    )
+
+
+def test_bulk_parse(tmp_path: "Path") -> None:
+    """Test parsing several resources with thread and process pools."""
+    from ase.build import molecule
+    from ase.io import write
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    molecules = [molecule(name) for name in ("H2O", "CH4", "C2H6", "NH3")]
+    filepaths = []
+    for atoms in molecules:
+        filepath = tmp_path / f"{atoms.get_chemical_formula()}.xyz"
+        write(filepath, atoms)
+        filepaths.append(filepath)
+
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    config = ResourceConfig(
+        downloadUrl=filepaths[0].as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={
+            "downloadUrls": [filepath.as_uri() for filepath in filepaths[1:]],
+            "processes": 2,
+            "datacache_config": datacache_config,
+        },
+    )
+    output = AtomisticStructureParseStrategy(config).get()
+
+    cache = DataCache(datacache_config)
+    assert output.cached_atoms_key == output.cached_atoms_keys[0]
+    assert [cache.get(key) for key in output.cached_atoms_keys] == molecules
+
+
+def test_incremental_parse(tmp_path: "Path") -> None:  # pylint: disable=too-many-locals
+    """Test that frames appended to a trajectory are ingested incrementally."""
+    from ase.build import molecule
+    from ase.io import read, write
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+    from oteapi_asmod.trajectory import iter_frames, load_manifest
+
+    frames = []
+    for i in range(7):
+        atoms = molecule("CH4")
+        atoms.positions += 0.1 * i
+        frames.append(atoms)
+    filepath = tmp_path / "growing.xyz"
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={
+            "incremental": True,
+            "chunksize": 2,
+            "instrument": True,
+            "datacache_config": datacache_config,
+        },
+    )
+    cache = DataCache(datacache_config)
+
+    write(filepath, frames[:3])
+    # A partially written frame is left for the next call
+    with open(filepath, "a", encoding="utf8") as handle:
+        handle.write("5\nPartial frame\nC 0.0 0.0 0.0\n")
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.nframes == output.appended_frames == 3
+    first_chunks = load_manifest(cache, output.cached_atoms_key).chunks
+
+    write(filepath, frames)
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.appended_frames == 4
+    assert output.nframes == 7
+    scan = {record["stage"]: record for record in output.stages}["scan"]
+    assert scan["nbytes"] < filepath.stat().st_size
+
+    manifest = load_manifest(cache, output.cached_atoms_key)
+    assert manifest.chunks[:2] == first_chunks
+    assert manifest.chunk_frames == [2, 1, 2, 2]
+    assert list(iter_frames(cache, output.cached_atoms_key)) == read(
+        filepath, index=":"
+    )
+
+    # Nothing new to ingest
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.appended_frames == 0
+    assert output.nframes == 7
+
+    # Replaced content is ingested from the start
+    write(filepath, frames[:2])
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.nframes == output.appended_frames == 2
+
+
+def test_incremental_partial_line(tmp_path: "Path") -> None:
+    """Test that a line cut off in the middle is not ingested."""
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+    from oteapi_asmod.trajectory import iter_frames
+
+    filepath = tmp_path / "growing.xyz"
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    config = ResourceConfig(
+        downloadUrl=filepath.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"incremental": True, "datacache_config": datacache_config},
+    )
+
+    # The writer is producing "O 0 0 1.25"
+    filepath.write_bytes(b"1\nfirst\nO 0 0 0\n1\nsecond\nO 0 0 1")
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.nframes == output.appended_frames == 1
+
+    with open(filepath, "ab") as handle:
+        handle.write(b".25\n")
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.appended_frames == 1
+    frames = list(iter_frames(DataCache(datacache_config), output.cached_atoms_key))
+    assert frames[1].positions[0, 2] == 1.25
+
+    output = AtomisticStructureParseStrategy(config).get()
+    assert output.appended_frames == 0
+    assert output.nframes == 2
+
+
+def test_inspect(tmp_path: "Path", parse: "Callable") -> None:
+    """Test summarizing XYZ and other content without storing the frames."""
+    from ase.build import bulk, molecule
+    from ase.io import write
+
+    frames = [molecule("H2O"), bulk("Cu", cubic=True), molecule("CH4")]
+    filepaths = [tmp_path / "frames.xyz", tmp_path / "POSCAR"]
+    write(filepaths[0], frames)
+    write(filepaths[1], frames[1], format="vasp")
+
+    output = parse(filepaths[0], inspect=True)
+    assert output.cached_atoms_key is None
+    summary = output.summary
+    assert summary.nframes == 3
+    assert summary.natoms == [3, 4, 5]
+    assert summary.species == ["C", "Cu", "H", "O"]
+    assert summary.composition == {"C": 1, "Cu": 4, "H": 6, "O": 1}
+    assert summary.has_cell and summary.periodic
+
+    summary = parse(filepaths[0], inspect=True, index="::2").summary
+    assert summary.natoms == [3, 5]
+    assert not summary.has_cell and not summary.periodic
+
+    summary = parse(filepaths[1], inspect=True, fileformat="vasp").summary
+    assert summary.natoms == [4]
+    assert summary.composition == {"Cu": 4}
+    assert summary.has_cell and summary.periodic
+
+
+def test_compressed_read(tmp_path: "Path") -> None:  # pylint: disable=too-many-locals
+    """Test streaming compressed trajectories into the reader."""
+    import bz2
+    import gzip
+    import lzma
+
+    from ase.build import molecule
+    from ase.io import read, write
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+    from oteapi_asmod.trajectory import iter_frames
+
+    frames = []
+    for i in range(6):
+        atoms = molecule("C2H6")
+        atoms.rattle(0.1, seed=i)
+        frames.append(atoms)
+    filepath = tmp_path / "trajectory.extxyz"
+    write(filepath, frames)
+    expected = read(filepath, index="1::2")
+
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+    compressed = {
+        "trajectory.extxyz.gz": gzip.compress(filepath.read_bytes()),
+        "trajectory.extxyz.bz2": bz2.compress(filepath.read_bytes()),
+        # Detected from the magic bytes alone
+        "trajectory.extxyz": lzma.compress(filepath.read_bytes()),
+    }
+    for name, content in compressed.items():
+        (tmp_path / "compressed").mkdir(exist_ok=True)
+        path = tmp_path / "compressed" / name
+        path.write_bytes(content)
+        for in_memory in (True, False):
+            config = ResourceConfig(
+                downloadUrl=path.as_uri(),
+                mediaType="chemical/x-xyz",
+                configuration={
+                    "index": "1::2",
+                    "in_memory": in_memory,
+                    "memoize": False,
+                    "datacache_config": datacache_config,
+                },
+            )
+            output = AtomisticStructureParseStrategy(config).get()
+            assert output.parse_path == ("memory" if in_memory else "file")
+            assert list(iter_frames(cache, output.cached_atoms_key)) == expected
+
+    config = ResourceConfig(
+        downloadUrl=path.as_uri(),
+        mediaType="chemical/x-xyz",
+        configuration={"inspect": True, "datacache_config": datacache_config},
+    )
+    assert AtomisticStructureParseStrategy(config).get().summary.nframes == 6
+
+    from oteapi_asmod.compression import detect_compression, split_name
+
+    gz_content = compressed["trajectory.extxyz.gz"]
+    assert detect_compression("chemical/x-xyz+gzip", "trajectory", gz_content) == "gz"
+    assert detect_compression("application/gzip", "trajectory", gz_content) == "gz"
+    # A hint is not trusted without magic bytes
+    assert detect_compression(None, "trajectory.xyz.gz", b"2\n\nH 0 0 0\n") is None
+    assert split_name("trajectory.xyz.gz") == ("trajectory.xyz", "gz")
+    assert split_name("trajectory.xyz") == ("trajectory.xyz", None)
+
+
+def test_single_flight(  # pylint: disable=too-many-locals
+    monkeypatch, tmp_path: "Path", parse: "Callable"
+) -> None:
+    """Test that identical concurrent requests are parsed only once."""
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+
+    from ase.build import molecule
+    from ase.io import write
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+
+    filepath = tmp_path / "ethane.xyz"
+    write(filepath, molecule("C2H6"))
+    calls = []
+    get = AtomisticStructureParseStrategy._get
+
+    def slow_get(self, *args):
+        calls.append(self)
+        time.sleep(0.5)
+        return get(self, *args)
+
+    monkeypatch.setattr(AtomisticStructureParseStrategy, "_get", slow_get)
+    barrier = Barrier(4)
+
+    def parse_concurrently(_):
+        barrier.wait()
+        return parse(filepath, memoize=False)
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(parse_concurrently, range(4)))
+    assert len(calls) == 1
+    assert sorted(result.cache_hit for result in results) == [False] + [True] * 3
+    assert len({result.cached_atoms_key for result in results}) == 1
+
+    # Requests after the flight, or with other options, do the work
+    assert not parse(filepath, memoize=False).cache_hit
+    assert not parse(filepath, memoize=False, serialization="npz").cache_hit
+    assert not parse(filepath, memoize=False, single_flight=False).cache_hit
+    assert len(calls) == 4
+
+
+def test_single_flight_lock(tmp_path: "Path") -> None:
+    """Test that a waiting request can be cancelled, and that an expired lock
+    does not release the lock of the next request."""
+    import asyncio
+    import time
+    from contextlib import ExitStack
+
+    import pytest
+    from oteapi.datacache import DataCache
+
+    from oteapi_asmod.aio import run_blocking
+    from oteapi_asmod.singleflight import lock, single_flight
+
+    cache = DataCache({"cacheDir": str(tmp_path / "cache")})
+    calls = []
+    with lock(cache, "oteapi-asmod-flight-key-lock", expire=60):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(
+                run_blocking(
+                    single_flight, cache, "key", lambda: calls.append(1), timeout=0.2
+                )
+            )
+    time.sleep(0.2)
+    assert not calls
+
+    with ExitStack() as expired:
+        expired.enter_context(lock(cache, "lock", expire=0.1))
+        time.sleep(0.2)
+        with lock(cache, "lock", expire=60):
+            expired.close()
+            assert "lock" in cache.diskcache
+    assert "lock" not in cache.diskcache
+
+
+def test_select_atoms(  # pylint: disable=too-many-locals
+    tmp_path: "Path", parse: "Callable"
+) -> None:
+    """Test selecting atoms while the frames are read."""
+    import numpy as np
+    from ase.build import bulk
+    from ase.io import write
+    from oteapi.datacache import DataCache
+
+    from oteapi_asmod.trajectory import iter_frames
+
+    frames = []
+    for i in range(3):
+        atoms = bulk("MgO", "rocksalt", a=4.2, cubic=True).repeat(2)
+        atoms.rattle(0.01, seed=i)
+        frames.append(atoms)
+    filepath = tmp_path / "mgo.xyz"
+    write(filepath, frames)
+
+    cache = DataCache({"cacheDir": str(tmp_path / "cache")})
+    select = {"elements": ["O"], "box": [[-0.1] * 3, [4.3, 4.3, 2.2]]}
+    for fast_xyz in (True, False):
+        output = parse(filepath, index=":", select=select, fast_xyz=fast_xyz)
+        selected = list(iter_frames(cache, output.cached_atoms_key))
+        assert len(selected) == 3
+        for atoms, frame in zip(selected, frames):
+            mask = (frame.numbers == 8) & np.all(
+                (frame.positions >= -0.1) & (frame.positions <= [4.3, 4.3, 2.2]),
+                axis=1,
+            )
+            assert 0 < len(atoms) < len(frame)
+            assert np.allclose(atoms.positions, frame.positions[mask])
+            assert np.allclose(atoms.cell, frame.cell)
+
+    atoms = cache.get(parse(filepath, select={"indices": "0:10:2"}).cached_atoms_key)
+    assert np.allclose(atoms.positions, frames[-1].positions[0:10:2])
+
+    summary = parse(filepath, inspect=True, select={"elements": ["Mg"]}).summary
+    assert summary.composition == {"Mg": 3 * 32}
@@ -0,0 +1,38 @@
+"""Test serialization of ase.Atoms in the data cache."""
+
+
+def test_npz_roundtrip() -> None:
+    """Test that atoms survive encoding to and decoding from `npz` bytes."""
+    import numpy as np
+    from ase.build import bulk
+    from ase.calculators.singlepoint import SinglePointCalculator
+    from ase.constraints import FixAtoms
+    from oteapi.datacache import DataCache
+
+    from oteapi_asmod.serialize import is_npz, load_atoms, store_atoms
+
+    atoms = bulk("Cu", cubic=True).repeat(2)
+    atoms.set_initial_magnetic_moments(np.linspace(0, 1, len(atoms)))
+    atoms.set_constraint(FixAtoms(indices=[0, 1]))
+    atoms.info.update({"step": 3, "comment": "relaxed", "stress": [1.0, 2.0, 3.0]})
+    atoms.info.update({"names": np.array(["a", "b"]), "meta": {"arr": np.arange(3)}})
+    atoms.calc = SinglePointCalculator(atoms, energy=-1.5, forces=atoms.positions)
+
+    cache = DataCache()
+    key = store_atoms(cache, [atoms, atoms], serialization="npz", keep_decoded=False)
+    assert is_npz(cache.get(key))
+
+    for decoded in load_atoms(cache, key):
+        assert decoded == atoms
+        assert np.array_equal(
+            decoded.get_initial_magnetic_moments(),
+            atoms.get_initial_magnetic_moments(),
+        )
+        assert decoded.info["step"] == 3
+        assert decoded.info["comment"] == "relaxed"
+        assert decoded.info["stress"] == [1.0, 2.0, 3.0]
+        assert decoded.info["names"].tolist() == ["a", "b"]
+        assert np.array_equal(decoded.info["meta"]["arr"], np.arange(3))
+        assert decoded.get_potential_energy() == -1.5
+        assert np.array_equal(decoded.calc.results["forces"], atoms.positions)
+        assert decoded.constraints[0].index.tolist() == [0, 1]
@@ -0,0 +1,80 @@
+"""Test the fast XYZ reader."""
+
+
+def test_fast_xyz_read() -> None:  # pylint: disable=too-many-locals
+    """Test that the fast XYZ reader gives the same frames as the ase reader."""
+    import io
+
+    import numpy as np
+    from ase.build import bulk, molecule
+    from ase.calculators.singlepoint import SinglePointCalculator
+    from ase.io import iread, write
+
+    from oteapi_asmod.xyz import iread_xyz
+
+    frames = []
+    for i in range(6):
+        atoms = bulk("Cu", cubic=True).repeat(2) if i % 2 else molecule("C2H6")
+        atoms.rattle(0.1, seed=i)
+        atoms.info["step"] = i
+        if i % 3 == 0:
+            atoms.calc = SinglePointCalculator(atoms, energy=-1.0 * i)
+        if i == 5:
+            # Extra per-atom columns are read by the ase fallback
+            atoms.calc = SinglePointCalculator(atoms, forces=atoms.positions)
+        frames.append(atoms)
+    stream = io.StringIO()
+    write(stream, frames, format="extxyz")
+    text = stream.getvalue()
+
+    for index in (":", "::2", "-2:", 3, -1):
+        expected = list(iread(io.StringIO(text), index=index, format="extxyz"))
+        parsed = list(iread_xyz(text.encode(), index))
+        assert parsed == expected
+        for atoms, reference in zip(parsed, expected):
+            assert atoms.info == reference.info
+            assert (atoms.calc is None) == (reference.calc is None)
+            if atoms.calc is not None:
+                for name, value in reference.calc.results.items():
+                    assert np.array_equal(atoms.calc.results[name], value)
+
+
+def test_frame_index(tmp_path: "Path") -> None:  # pylint: disable=too-many-locals
+    """Test that frames are read through the stored frame index."""
+    from ase.build import molecule
+    from ase.io import read, write
+    from oteapi.datacache import DataCache
+    from oteapi.models.resourceconfig import ResourceConfig
+
+    from oteapi_asmod.strategies.parse import AtomisticStructureParseStrategy
+    from oteapi_asmod.trajectory import iter_frames
+    from oteapi_asmod.xyz import frame_index_key
+
+    frames = [molecule(name) for name in ("H2O", "CH4", "C2H6", "NH3", "CO2")]
+    filepath = tmp_path / "frames.xyz"
+    write(filepath, frames)
+    datacache_config = {"cacheDir": str(tmp_path / "cache")}
+    cache = DataCache(datacache_config)
+
+    def parse(index: str) -> "List[Atoms]":
+        config = ResourceConfig(
+            downloadUrl=filepath.as_uri(),
+            mediaType="chemical/x-xyz",
+            configuration={
+                "index": index,
+                "memoize": False,
+                "datacache_config": datacache_config,
+            },
+        )
+        key = AtomisticStructureParseStrategy(config).get().cached_atoms_key
+        return list(iter_frames(cache, key))
+
+    assert parse("1:3") == read(filepath, index="1:3")
+    index_keys = [key for key in cache.diskcache if key.startswith(frame_index_key(""))]
+    assert len(index_keys) == 1
+    index = cache.get(index_keys[0])
+    assert list(index["natoms"]) == [len(atoms) for atoms in frames]
+
+    # A corrupted index shows that later parses use it instead of scanning
+    cache.add({name: values[::-1] for name, values in index.items()}, key=index_keys[0])
+    assert parse("0") == read(filepath, index="-1:")